@@ -0,0 +1,189 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+from board import STARTING_FEN, Board
+from pgn import describe_game, read_games, replay_game
+from perft import find_move, get_move_name, get_moves, perft
+
+# Runs perft and PGN validation across a pool of processes. Workers only
+# receive FEN and PGN text, and results are put back in the order the work
+# was handed out, so the output is the same however many processes are used.
+
+
+def perft_task(fen: str, name: str, depth: int):
+    """Count the positions below one move at the root, in a worker process."""
+    start = time.perf_counter()
+
+    board = Board()
+    board.load_fen(fen)
+
+    board.make_move(*find_move(board, name))
+    nodes = perft(board, depth - 1)
+
+    return name, nodes, {"pid": os.getpid(), "tasks": 1, "work": nodes,
+                         "seconds": time.perf_counter() - start}
+
+
+def pgn_task(games: list):
+    """Replay a batch of games, in a worker process."""
+    start = time.perf_counter()
+
+    board = Board()
+    results = [replay_game(headers, movetext, board) for headers, movetext in games]
+
+    return results, {"pid": os.getpid(), "tasks": 1, "work": len(games),
+                     "seconds": time.perf_counter() - start}
+
+
+def ordered_map(pool: Pool, function, tasks, window: int):
+    """Yield the results of running a function on each task, in the order of the tasks.
+
+    Only a window of tasks is handed to the pool at a time, so tasks can come
+    from a generator that is never fully read into memory.
+    """
+    pending = deque()
+
+    for task in tasks:
+        pending.append(pool.apply_async(function, task))
+
+        if len(pending) >= window:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
+
+
+def merge_stats(worker_stats: dict, stats: dict):
+    """Add the stats of one task to the totals for its worker."""
+    totals = worker_stats.setdefault(stats["pid"], {"tasks": 0, "work": 0, "seconds": 0})
+
+    for key in totals:
+        totals[key] += stats[key]
+
+
+def print_stats(worker_stats: dict, unit: str):
+    """Show how much work each worker did and how fast."""
+    for number, (pid, totals) in enumerate(sorted(worker_stats.items()), 1):
+        rate = totals["work"] / totals["seconds"] if totals["seconds"] > 0 else 0
+        print(f"Worker {number} (pid {pid}): {totals['tasks']} tasks, "
+              f"{totals['work']} {unit} in {totals['seconds']:.3f}s ({rate:.0f} {unit}/s)")
+
+
+def run_perft(fen: str, depth: int, processes: int):
+    """Run perft with each move at the root counted in a separate task.
+
+    Returns the counts by move name, and the stats of each worker.
+    """
+    board = Board()
+    board.load_fen(fen)
+
+    names = sorted(get_move_name(*move) for move in get_moves(board))
+    results = {}
+    worker_stats = {}
+
+    if depth < 1:
+        return results, worker_stats
+
+    with Pool(processes) as pool:
+        tasks = [(fen, name, depth) for name in names]
+
+        for name, nodes, stats in ordered_map(pool, perft_task, tasks, len(tasks)):
+            results[name] = nodes
+            merge_stats(worker_stats, stats)
+
+    return results, worker_stats
+
+
+def get_batches(path: str, batch_size: int):
+    """Yield the games of a PGN file in lists of up to batch_size games."""
+    batch = []
+
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for game in read_games(file):
+            batch.append(game)
+
+            if len(batch) >= batch_size:
+                yield (batch,)
+                batch = []
+
+    if batch:
+        yield (batch,)
+
+
+def run_pgn(path: str, batch_size: int, processes: int, worker_stats: dict):
+    """Yield the replay of every game in a PGN file, with batches of games replayed in parallel.
+
+    Games come out in the order of the file, and the stats of each worker are
+    added to worker_stats as their batches finish.
+    """
+    with Pool(processes) as pool:
+        for results, stats in ordered_map(pool, pgn_task, get_batches(path, batch_size),
+                                          processes * 2):
+            merge_stats(worker_stats, stats)
+            yield from results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run perft or PGN validation across several processes.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="how many worker processes to use, one per core by default")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    perft_parser = commands.add_parser("perft", help="count positions, one task per root move")
+    perft_parser.add_argument("--fen", default=STARTING_FEN)
+    perft_parser.add_argument("--depth", type=int, default=4)
+    perft_parser.add_argument("--divide", action="store_true",
+                              help="show the count below each legal move")
+
+    pgn_parser = commands.add_parser("pgn", help="replay the games in a PGN file")
+    pgn_parser.add_argument("pgn", help="the PGN file to read")
+    pgn_parser.add_argument("--batch-size", type=int, default=100,
+                            help="how many games to send to a worker at once")
+    pgn_parser.add_argument("--all", action="store_true",
+                            help="show every game, not just the ones with illegal moves")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    if args.command == "perft":
+        results, worker_stats = run_perft(args.fen, args.depth, args.processes)
+
+        if args.divide:
+            for name, count in results.items():
+                print(f"{name}: {count}")
+
+        nodes = sum(results.values())
+        seconds = time.perf_counter() - start
+
+        print_stats(worker_stats, "nodes")
+        print(f"Nodes: {nodes}")
+        print(f"Time: {seconds:.3f}s ({nodes / seconds if seconds > 0 else 0:.0f} nodes/s)")
+        return
+
+    games = 0
+    illegal = 0
+    worker_stats = {}
+
+    for number, game in enumerate(run_pgn(args.pgn, args.batch_size, args.processes,
+                                          worker_stats), 1):
+        games += 1
+
+        if game["error"] is not None:
+            illegal += 1
+
+        if args.all or game["error"] is not None:
+            print(describe_game(number, game))
+
+    seconds = time.perf_counter() - start
+
+    print_stats(worker_stats, "games")
+    print(f"{games} games, {illegal} with illegal moves in {seconds:.3f}s")
+    sys.exit(1 if illegal else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+from constants import PieceColor, PieceType
+from tables import BISHOP_DIRECTIONS, PAWN_STEPS, ROOK_DIRECTIONS
+import tables
+
+# Squares are numbered y * 8 + x, the same as Position.index, so bit 0 is
+# the top left corner of the board and bit 63 the bottom right.
+
+
+def to_bitboard(indexes: list):
+    """Combine a list of square indexes into a bitboard"""
+    bitboard = 0
+
+    for index in indexes:
+        bitboard |= 1 << index
+
+    return bitboard
+
+
+KNIGHT_ATTACKS = [to_bitboard(targets) for targets in tables.KNIGHT_TARGETS]
+KING_ATTACKS = [to_bitboard(targets) for targets in tables.KING_TARGETS]
+PAWN_ATTACKS = [[to_bitboard(targets) for targets in color_targets]
+                for color_targets in tables.PAWN_ATTACKS]
+
+RAYS = {direction: [to_bitboard(ray) for ray in rays]
+        for direction, rays in tables.RAYS.items()}
+
+# Rays that run towards higher square numbers hit their lowest set bit first
+INCREASING = {direction: direction[1] > 0 or (direction[1] == 0 and direction[0] > 0)
+              for direction in RAYS}
+
+# Rows a pawn has to stand on to capture en passant
+EN_PASSANT_ROWS = [3, 4]
+
+# The rows pawns promote on, top and bottom
+PROMOTION_ROWS = to_bitboard(range(8)) | to_bitboard(range(56, 64))
+
+ALL_SQUARES = (1 << 64) - 1
+
+
+def _between_table():
+    """The squares strictly between each pair of squares on a shared line, 0 if
+    they don't share one"""
+    table = [[0] * 64 for _ in range(64)]
+
+    for direction, rays in tables.RAYS.items():
+        for start in range(64):
+            between = 0
+
+            for end in rays[start]:
+                table[start][end] = between
+                between |= 1 << end
+
+    return table
+
+
+# Indexed by one square, then the other
+BETWEEN = _between_table()
+
+
+def ray_attacks(direction: tuple, index: int, occupied: int):
+    """Squares attacked along a ray, up to and including the first piece hit"""
+    ray = RAYS[direction][index]
+    blockers = ray & occupied
+
+    if blockers:
+        if INCREASING[direction]:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+
+        ray ^= RAYS[direction][blocker]
+
+    return ray
+
+
+def slider_attacks(directions: list, index: int, occupied: int):
+    """Squares attacked by a sliding piece moving along the directions"""
+    attacks = 0
+
+    for direction in directions:
+        attacks |= ray_attacks(direction, index, occupied)
+
+    return attacks
+
+
+def _relevant_mask(directions: list, index: int):
+    """The squares along the directions whose pieces can block a slider, the
+    last square of each ray never blocks anything behind it"""
+    mask = 0
+
+    for direction in directions:
+        mask |= to_bitboard(tables.RAYS[direction][index][:-1])
+
+    return mask
+
+
+ROOK_MASKS = [_relevant_mask(ROOK_DIRECTIONS, index) for index in range(64)]
+BISHOP_MASKS = [_relevant_mask(BISHOP_DIRECTIONS, index) for index in range(64)]
+
+# Slider attacks by square, then by the blockers on the square's mask. The
+# tables fill up as positions are seen, instead of all at import.
+_rook_attacks = [{} for _ in range(64)]
+_bishop_attacks = [{} for _ in range(64)]
+
+
+def rook_attacks(index: int, occupied: int):
+    """Squares attacked by a rook, looked up by the pieces that can block it"""
+    blockers = occupied & ROOK_MASKS[index]
+    attacks = _rook_attacks[index].get(blockers)
+
+    if attacks is None:
+        attacks = _rook_attacks[index][blockers] = slider_attacks(ROOK_DIRECTIONS, index, blockers)
+
+    return attacks
+
+
+def bishop_attacks(index: int, occupied: int):
+    """Squares attacked by a bishop, looked up by the pieces that can block it"""
+    blockers = occupied & BISHOP_MASKS[index]
+    attacks = _bishop_attacks[index].get(blockers)
+
+    if attacks is None:
+        attacks = _bishop_attacks[index][blockers] = slider_attacks(BISHOP_DIRECTIONS, index, blockers)
+
+    return attacks
+
+
+class Bitboards:
+    """Mirrors the pieces on a board as 64 bit integers, by color and by color
+    and type, and generates legal moves from them."""
+
+    def __init__(self, board: 'Board'):
+        self.board = board
+        self.colors = [0, 0]
+        self.types = [{piece_type: 0 for piece_type in [
+            PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+            PieceType.ROOK, PieceType.QUEEN, PieceType.KING]} for _ in range(2)]
+
+    def update(self, index: int, old: 'Piece', new: 'Piece'):
+        """Record that the piece on a square changed."""
+        bit = 1 << index
+
+        if old is not None:
+            self.colors[old.color] &= ~bit
+            self.types[old.color][old.type] &= ~bit
+
+        if new is not None:
+            self.colors[new.color] |= bit
+            self.types[new.color][new.type] |= bit
+
+    def get_attackers(self, index: int, color: PieceColor, occupied: int):
+        """Get the pieces of a color attacking a square, as a bitboard.
+
+        Only pieces in occupied count, so pieces can be taken off the board
+        just for the check by leaving them out.
+        """
+        types = self.types[color]
+        rooks = types[PieceType.ROOK] | types[PieceType.QUEEN]
+        bishops = types[PieceType.BISHOP] | types[PieceType.QUEEN]
+
+        attackers = KNIGHT_ATTACKS[index] & types[PieceType.KNIGHT] \
+            | KING_ATTACKS[index] & types[PieceType.KING] \
+            | PAWN_ATTACKS[1 - color][index] & types[PieceType.PAWN]
+
+        if rooks:
+            attackers |= rook_attacks(index, occupied) & rooks
+        if bishops:
+            attackers |= bishop_attacks(index, occupied) & bishops
+
+        return attackers & occupied
+
+    def get_legal_targets(self, color: PieceColor):
+        """Get the squares each piece of a color can legally move to, as bitboards.
+
+        Checks and pins are worked out once from the king's square, so no
+        move has to be tried on the board to see if it leaves the king in check.
+        """
+        squares = self.board.squares
+        opponent = 1 - color
+        own = self.colors[color]
+        enemy = self.colors[opponent]
+        occupied = own | enemy
+
+        kings = self.types[color][PieceType.KING]
+        king_index = kings.bit_length() - 1 if kings else None
+        check_mask = ALL_SQUARES
+        pins = {}
+        checkers = 0
+
+        if king_index is not None:
+            checkers = self.get_attackers(king_index, opponent, occupied)
+
+            if checkers & checkers - 1:
+                check_mask = 0
+            elif checkers:
+                checker = checkers.bit_length() - 1
+                check_mask = BETWEEN[king_index][checker] | checkers
+
+            # Sliders that would see the king through exactly one of our pieces pin it
+            types = self.types[opponent]
+            snipers = rook_attacks(king_index, enemy) \
+                & (types[PieceType.ROOK] | types[PieceType.QUEEN]) \
+                | bishop_attacks(king_index, enemy) \
+                & (types[PieceType.BISHOP] | types[PieceType.QUEEN])
+
+            while snipers:
+                sniper = snipers & -snipers
+                snipers ^= sniper
+
+                between = BETWEEN[king_index][sniper.bit_length() - 1]
+                blockers = between & occupied
+
+                if blockers and not blockers & blockers - 1 and blockers & own:
+                    pins[blockers.bit_length() - 1] = between | sniper
+
+        targets = {}
+        remaining = own
+
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+
+            index = bit.bit_length() - 1
+            piece = squares[index].piece
+
+            if piece.type == PieceType.KING:
+                targets[piece] = self.get_king_targets(piece, checkers, occupied)
+                continue
+
+            # Only the king can get out of double check
+            if not check_mask:
+                targets[piece] = 0
+                continue
+
+            if piece.type == PieceType.PAWN:
+                moves = self.get_pawn_targets(piece, occupied, enemy)
+            elif piece.type == PieceType.KNIGHT:
+                moves = KNIGHT_ATTACKS[index]
+            elif piece.type == PieceType.BISHOP:
+                moves = bishop_attacks(index, occupied)
+            elif piece.type == PieceType.ROOK:
+                moves = rook_attacks(index, occupied)
+            else:
+                moves = rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+
+            moves &= ~own & check_mask
+
+            if index in pins:
+                moves &= pins[index]
+
+            if piece.type == PieceType.PAWN and index // 8 == EN_PASSANT_ROWS[color]:
+                moves |= self.get_en_passant_targets(piece, occupied, king_index)
+
+            targets[piece] = moves
+
+        return targets
+
+    def get_pawn_targets(self, piece: 'Piece', occupied: int, enemy: int):
+        """The pushes and captures of a pawn, without en passant."""
+        index = piece.pos.index
+        targets = PAWN_ATTACKS[piece.color][index] & enemy
+        step = PAWN_STEPS[piece.color]
+
+        # Forward 1, then forward 2 on the pawn's first move
+        forward = index + step
+        if 0 <= forward < 64 and not occupied >> forward & 1:
+            targets |= 1 << forward
+
+            forward += step
+            if piece.first_move and 0 <= forward < 64 and not occupied >> forward & 1:
+                targets |= 1 << forward
+
+        return targets
+
+    def get_en_passant_targets(self, piece: 'Piece', occupied: int, king_index: int):
+        """The en passant captures of a pawn that don't leave the king in check."""
+        targets = 0
+
+        for pos in piece.get_en_passant_moves():
+            # Both pawns leave their squares at once, which can uncover the king
+            captured = pos.index - PAWN_STEPS[piece.color]
+            after = occupied ^ (1 << piece.pos.index) ^ (1 << captured) | (1 << pos.index)
+
+            if king_index is None or not self.get_attackers(king_index, 1 - piece.color, after):
+                targets |= 1 << pos.index
+
+        return targets
+
+    def get_king_targets(self, king: 'Piece', checkers: int, occupied: int):
+        """The squares a king can move to without being attacked."""
+        index = king.pos.index
+        opponent = 1 - king.color
+
+        # The king can't hide from a slider behind itself
+        without_king = occupied & ~(1 << index)
+        targets = 0
+        candidates = KING_ATTACKS[index] & ~self.colors[king.color]
+
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+
+            if not self.get_attackers(bit.bit_length() - 1, opponent, without_king):
+                targets |= bit
+
+        # Castling can't start in check or pass over an attacked square
+        if not checkers:
+            for pos in king.get_castling_moves():
+                passed = (pos.index + index) // 2
+
+                if targets >> passed & 1 and not self.get_attackers(pos.index, opponent, occupied):
+                    targets |= 1 << pos.index
+
+        return targets
+
+    def count_moves(self, color: PieceColor):
+        """Count the legal moves of a color, each promotion counting once per piece
+        it can promote to."""
+        count = 0
+
+        for piece, targets in self.get_legal_targets(color).items():
+            count += targets.bit_count()
+
+            if piece.type == PieceType.PAWN:
+                count += (targets & PROMOTION_ROWS).bit_count() * 3
+
+        return count
+
+    def get_positions(self, targets: int):
+        """Convert a bitboard into a list of positions."""
+        squares = self.board.squares
+        positions = []
+
+        while targets:
+            lowest = targets & -targets
+            positions.append(squares[lowest.bit_length() - 1])
+            targets ^= lowest
+
+        return positions
+
+    def get_moves(self, piece: 'Piece'):
+        """Returns the same moves as the piece's get_pseudo_moves"""
+        index = piece.pos.index
+        own = self.colors[piece.color]
+        occupied = self.colors[PieceColor.WHITE] | self.colors[PieceColor.BLACK]
+
+        if piece.type == PieceType.KNIGHT:
+            targets = KNIGHT_ATTACKS[index]
+        elif piece.type == PieceType.KING:
+            targets = KING_ATTACKS[index]
+        elif piece.type == PieceType.ROOK:
+            targets = rook_attacks(index, occupied)
+        elif piece.type == PieceType.BISHOP:
+            targets = bishop_attacks(index, occupied)
+        elif piece.type == PieceType.QUEEN:
+            targets = rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+        elif piece.type == PieceType.PAWN:
+            targets = self.get_pawn_targets(piece, occupied, occupied)
+        else:
+            targets = 0
+
+        moves = self.get_positions(targets & ~own)
+
+        if piece.type == PieceType.PAWN:
+            if index // 8 == EN_PASSANT_ROWS[piece.color]:
+                moves += piece.get_en_passant_moves()
+        elif piece.type == PieceType.KING:
+            moves += piece.get_castling_moves()
+
+        return moves
@@ -1,84 +1,103 @@
-from turtle import position
-import pygame
-from constants import Colors, TransparentColors, PieceColor, PieceType
-import random
+from collections import OrderedDict
+from constants import Backend, PieceColor, PieceType
+from bitboard import Bitboards
+from tables import CASTLING_SQUARES, KING_TARGETS, KNIGHT_TARGETS, PAWN_ATTACKS, PAWN_STEPS, \
+    QUEEN_DIRECTIONS, RAYS, SLIDING_TYPES
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+
+PIECE_TYPES = [PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+               PieceType.ROOK, PieceType.QUEEN, PieceType.KING]
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# The letters FEN uses for black pieces, white pieces use upper case
+PIECE_LETTERS = {"p": PieceType.PAWN, "n": PieceType.KNIGHT, "b": PieceType.BISHOP,
+                 "r": PieceType.ROOK, "q": PieceType.QUEEN, "k": PieceType.KING}
+
+# The castling right letters in the order of tables.CASTLING_SQUARES
+CASTLING_LETTERS = "KQkq"
 
 
 class Board:
     """The board for the game. Stores positions and king pieces."""
 
-    def __init__(self, x: int, y: int, size: int):
-        self.x = x
-        self.y = y
-        self.size = size // 8 * 8  # Rounds to the nearest multiple of 8
+    # How many positions to remember the legal moves of
+    move_cache_size = 256
+
+    def __init__(self, backend: Backend = Backend.OBJECTS):
+        # Created first so positions can report pieces to them
+        if backend == Backend.BITBOARD:
+            self.bitboards = Bitboards(self)
+        else:
+            self.bitboards = None
 
-        self.screen = pygame.Surface((self.size, self.size))
+        self.hash = 0
 
-        self.board = [[Position(x, y, self.size // 8, self)
+        self.board = [[Position(x, y, self)
                        for x in range(8)] for y in range(8)]
+        self.squares = [pos for row in self.board for pos in row]
 
-        self.selected_pos = None
+        self._move = 0
+        self._en_passant = None
 
-        self.move = 0
+        # Moves since the last capture or pawn move, for the fifty move rule
+        self.halfmove_clock = 0
 
         self.white_king = None
         self.black_king = None
 
-    @property
-    def selected_pos(self):
-        """Stores which position is selected."""
-        return self._selected_pos
+        # The pieces on the board by color, and by color then type
+        self.pieces = [[], []]
+        self.piece_types = [{piece_type: [] for piece_type in PIECE_TYPES}
+                            for _ in range(2)]
 
-    @selected_pos.setter
-    def selected_pos(self, pos: 'Position'):
+        self.move_cache = OrderedDict()
 
-        try:
-            if self._selected_pos is not None:
-                self._selected_pos.selected = False
-        except AttributeError:
-            self._selected_pos = None
-            return
+        # One record for each move made with make_move, see unmake_move
+        self.undo_stack = []
 
-        if pos is None:
-            self._selected_pos = None
-            return
+    @property
+    def move(self):
+        """The number of moves made so far, white moves on even numbers."""
+        return self._move
 
-        self._selected_pos = pos
-        self._selected_pos.selected = True
+    @move.setter
+    def move(self, value: int):
+        if (value - self._move) % 2:
+            self.hash ^= BLACK_TO_MOVE_KEY
 
-    def __index__(self, index):
-        return self.board[index]
+        self._move = value
 
-    def __iter__(self):
-        return iter(self.board)
-
-    def draw(self, screen: pygame.Surface):
-        """Draw the board and all pieces"""
-        for row in self.board:
-            for position in row:
-                position.draw(self.screen)
+    @property
+    def en_passant(self):
+        """The position a pawn skipped over with a double move on the last move."""
+        return self._en_passant
 
-        screen.blit(self.screen, (self.x, self.y))
+    @en_passant.setter
+    def en_passant(self, pos: 'Position'):
+        if self._en_passant is not None:
+            self.hash ^= EN_PASSANT_KEYS[self._en_passant.x]
 
-    def handle_click(self, pos: tuple):
-        """Send the click to the selected position."""
-        x, y = pos
-        x -= self.x
-        y -= self.y
+        if pos is not None:
+            self.hash ^= EN_PASSANT_KEYS[pos.x]
 
-        # If click is out of bounds, return
-        if x < 0 or y < 0 or x >= self.size or y >= self.size:
-            return
+        self._en_passant = pos
 
-        x = x // (self.size // 8)
-        y = y // (self.size // 8)
+    def __index__(self, index):
+        return self.board[index]
 
-        self.board[y][x].handle_click()
+    def __iter__(self):
+        return iter(self.board)
 
     def add_piece(self, piece: 'Piece', pos: tuple):
         """Link a piece to a position on the board."""
+        rights = self.get_castling_rights()
+
         x, y = pos
         piece.pos = self.board[y][x]
+        self.register_piece(piece)
+
+        self.update_castling_rights(rights)
 
         if piece.type == PieceType.KING:
             if piece.color == PieceColor.WHITE:
@@ -86,143 +105,549 @@ class Board:
             else:
                 self.black_king = piece
 
+    def register_piece(self, piece: 'Piece'):
+        """Add a piece to the board's lists of pieces."""
+        self.pieces[piece.color].append(piece)
+        self.piece_types[piece.color][piece.type].append(piece)
+
+    def unregister_piece(self, piece: 'Piece'):
+        """Remove a piece from the board's lists of pieces."""
+        self.pieces[piece.color].remove(piece)
+        self.piece_types[piece.color][piece.type].remove(piece)
+
+    def make_move(self, piece: 'Piece', pos: 'Position', promotion: PieceType = None):
+        """Move a piece and pass the turn, remembering how to take the move back.
+
+        Unlike Position.move this doesn't update check or checkmate, so it is
+        cheap enough to explore moves with.
+        """
+        start = piece.pos
+        captured = pos.piece
+
+        # En passant takes the pawn beside the one moving
+        if captured is None and piece.type == PieceType.PAWN and pos is self.en_passant:
+            captured = self.squares[pos.index - PAWN_STEPS[piece.color]].piece
+
+        # Castling also moves a rook, from the corner on the side the king goes
+        rook = None
+        if piece.type == PieceType.KING and abs(pos.index - start.index) == 2:
+            if pos.index > start.index:
+                rook = self.squares[start.index + 3].piece
+            else:
+                rook = self.squares[start.index - 4].piece
+
+        self.undo_stack.append((
+            piece, start, pos, piece.first_move,
+            captured, captured.pos if captured is not None else None,
+            rook, rook.pos if rook is not None else None,
+            rook.first_move if rook is not None else False,
+            self.en_passant, self.halfmove_clock, self.hash))
+
+        if captured is not None or piece.type == PieceType.PAWN:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        piece.move(pos, promotion)
+
+        self.move += 1
+
+    def unmake_move(self):
+        """Take back the last move made with make_move."""
+        piece, start, end, first_move, captured, captured_pos, \
+            rook, rook_start, rook_first_move, en_passant, halfmove_clock, key = self.undo_stack.pop()
+
+        # A promoted pawn was replaced by a new piece
+        if end.piece is not piece:
+            end.piece.take()
+            self.register_piece(piece)
+
+        end.piece = None
+        piece.pos = start
+        piece.first_move = first_move
+
+        if rook is not None:
+            rook.pos.piece = None
+            rook.pos = rook_start
+            rook.first_move = rook_first_move
+
+        if captured is not None:
+            captured.pos = captured_pos
+            self.register_piece(captured)
+
+        self.move -= 1
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+
+        # Restoring the key is cheaper than undoing each part of it
+        self.hash = key
+
+    def load_fen(self, fen: str):
+        """Replace the position on the board with the one described by a FEN string.
+
+        The halfmove clock and fullmove number can be left off the end. Raises
+        a ValueError describing the problem if the FEN can't be read.
+        """
+        # Imported here since the pieces module builds on this one
+        from pieces import PIECE_CLASSES
+
+        # Everything is checked before the board is cleared, so a bad FEN
+        # leaves the position as it was
+        fields = fen.split()
+        if not 4 <= len(fields) <= 6:
+            raise ValueError(f"FEN needs 4 to 6 fields, not {len(fields)}: {fen!r}")
+
+        placement, side, castling, en_passant = fields[:4]
+
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"FEN placement needs 8 rows, not {len(rows)}: {placement!r}")
+
+        # The letter of each piece by the index of its square
+        letters = {}
+
+        for y, row in enumerate(rows):
+            x = 0
+            for letter in row:
+                if letter in "12345678":
+                    x += int(letter)
+                    continue
+
+                if letter.lower() not in PIECE_LETTERS:
+                    raise ValueError(f"FEN has an unknown piece {letter!r}")
+
+                if x < 8:
+                    letters[y * 8 + x] = letter
+                x += 1
+
+            if x != 8:
+                raise ValueError(f"FEN row {8 - y} has {x} squares instead of 8: {row!r}")
+
+        for king in "Kk":
+            if list(letters.values()).count(king) > 1:
+                raise ValueError(f"FEN has more than one {king}")
+
+        if side not in ["w", "b"]:
+            raise ValueError(f"FEN side to move has to be w or b, not {side!r}")
+
+        if castling != "-":
+            for letter in castling:
+                if letter not in CASTLING_LETTERS or castling.count(letter) > 1:
+                    raise ValueError(f"FEN has bad castling rights {castling!r}")
+
+                color, king_index, rook_index = CASTLING_SQUARES[CASTLING_LETTERS.index(letter)]
+                king, rook = ("K", "R") if color == PieceColor.WHITE else ("k", "r")
+
+                if letters.get(king_index) != king or letters.get(rook_index) != rook:
+                    raise ValueError(f"FEN castling right {letter} needs its king and rook "
+                                     "on their starting squares")
+
+        if en_passant != "-" and (len(en_passant) != 2 or en_passant[0] not in "abcdefgh"
+                                  or en_passant[1] not in "36"):
+            raise ValueError(f"FEN has a bad en passant square {en_passant!r}")
+
+        try:
+            halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            fullmove = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"FEN move counters have to be numbers: {fen!r}") from None
+
+        if halfmove_clock < 0 or fullmove < 1:
+            raise ValueError(f"FEN move counters are out of range: {fen!r}")
+
+        for pos in self.squares:
+            if pos.piece is not None:
+                pos.piece.take()
+
+        self.white_king = None
+        self.black_king = None
+        self.undo_stack = []
+        self.en_passant = None
+
+        for index, letter in letters.items():
+            y, x = divmod(index, 8)
+            color = PieceColor.WHITE if letter.isupper() else PieceColor.BLACK
+            piece = PIECE_CLASSES[PIECE_LETTERS[letter.lower()]](color)
+
+            # Pawns can only double move from their starting row, and kings
+            # and rooks only keep their first move if they can still castle
+            if piece.type == PieceType.PAWN:
+                piece.first_move = y == (6 if color == PieceColor.WHITE else 1)
+            elif piece.type in [PieceType.KING, PieceType.ROOK]:
+                piece.first_move = False
+
+            self.add_piece(piece, (x, y))
+
+        for letter in castling.replace("-", ""):
+            color, king_index, rook_index = CASTLING_SQUARES[CASTLING_LETTERS.index(letter)]
+            self.squares[king_index].piece.first_move = True
+            self.squares[rook_index].piece.first_move = True
+
+        # White moves on even numbers, so the move count follows from both fields
+        self.move = (fullmove - 1) * 2 + (0 if side == "w" else 1)
+        self.halfmove_clock = halfmove_clock
+
+        if en_passant != "-":
+            self.en_passant = self.board[8 - int(en_passant[1])]["abcdefgh".index(en_passant[0])]
+
+        # Rights were added by hand, so the hash has to be rebuilt
+        self.hash = self.compute_hash()
+        self.check_checked()
+
+    def get_fen(self):
+        """Describe the position on the board as a FEN string."""
+        rows = []
+
+        for row in self.board:
+            text = ""
+            empty = 0
+
+            for pos in row:
+                if pos.piece is None:
+                    empty += 1
+                    continue
+
+                if empty:
+                    text += str(empty)
+                    empty = 0
+
+                letter = next(letter for letter, piece_type in PIECE_LETTERS.items()
+                              if piece_type == pos.piece.type)
+                text += letter.upper() if pos.piece.color == PieceColor.WHITE else letter
+
+            if empty:
+                text += str(empty)
+
+            rows.append(text)
+
+        rights = self.get_castling_rights()
+        castling = "".join(letter for bit, letter in enumerate(CASTLING_LETTERS)
+                           if rights >> bit & 1)
+
+        return " ".join(["/".join(rows),
+                         "w" if self.move % 2 == PieceColor.WHITE else "b",
+                         castling or "-",
+                         self.en_passant.name if self.en_passant is not None else "-",
+                         str(self.halfmove_clock),
+                         str(self.move // 2 + 1)])
+
+    def get_castling_rights(self):
+        """Get a bit mask of the castling rights still available.
+
+        A right is kept while its king and rook are on their starting squares
+        and haven't moved.
+        """
+        squares = self.squares
+        rights = 0
+
+        for bit, (color, king_index, rook_index) in enumerate(CASTLING_SQUARES):
+            king = squares[king_index].piece
+            rook = squares[rook_index].piece
+
+            if king is not None and king.color == color and king.type == PieceType.KING and king.first_move and \
+                    rook is not None and rook.color == color and rook.type == PieceType.ROOK and rook.first_move:
+                rights |= 1 << bit
+
+        return rights
+
+    def update_castling_rights(self, old_rights: int):
+        """Update the hash after a change that might have lost castling rights."""
+        rights = self.get_castling_rights()
+
+        if rights != old_rights:
+            self.hash ^= CASTLING_KEYS[old_rights] ^ CASTLING_KEYS[rights]
+
+    def compute_hash(self):
+        """Compute the Zobrist hash of the position from scratch.
+
+        Board.hash is kept up to date as pieces move and should always be
+        equal to this.
+        """
+        key = CASTLING_KEYS[self.get_castling_rights()]
+
+        for pos in self.squares:
+            if pos.piece is not None:
+                key ^= PIECE_KEYS[pos.piece.color, pos.piece.type][pos.index]
+
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant.x]
+
+        if self.move % 2 == PieceColor.BLACK:
+            key ^= BLACK_TO_MOVE_KEY
+
+        return key
+
+    def get_king(self, color: PieceColor):
+        """Get the king of a color."""
+        if color == PieceColor.WHITE:
+            return self.white_king
+        return self.black_king
+
+    def get_pieces(self, color: PieceColor, piece_type: PieceType = None):
+        """Get all pieces of a color that are on the board, optionally only of one type."""
+        if piece_type is None:
+            return self.pieces[color]
+        return self.piece_types[color][piece_type]
+
+    def get_attackers(self, index: int, color: PieceColor, ignore: 'Piece' = None):
+        """Yield every piece of a color that attacks a square.
+
+        The ignored piece is treated as if it wasn't on the board, so a king
+        can't hide from a slider behind itself.
+        """
+        squares = self.squares
+
+        for target in KNIGHT_TARGETS[index]:
+            piece = squares[target].piece
+            if piece is not None and piece.color == color and piece.type == PieceType.KNIGHT:
+                yield piece
+
+        for target in KING_TARGETS[index]:
+            piece = squares[target].piece
+            if piece is not None and piece.color == color and piece.type == PieceType.KING:
+                yield piece
+
+        # A pawn attacks this square from where an opposite pawn here would attack
+        for target in PAWN_ATTACKS[1 - color][index]:
+            piece = squares[target].piece
+            if piece is not None and piece.color == color and piece.type == PieceType.PAWN:
+                yield piece
+
+        for direction in QUEEN_DIRECTIONS:
+            for target in RAYS[direction][index]:
+                piece = squares[target].piece
+                if piece is None or piece is ignore:
+                    continue
+
+                if piece.color == color and piece.type in SLIDING_TYPES[direction]:
+                    yield piece
+                break
+
+    def is_attacked(self, index: int, color: PieceColor, ignore: 'Piece' = None):
+        """Check if a square is attacked by any piece of a color."""
+        for _ in self.get_attackers(index, color, ignore):
+            return True
+
+        return False
+
+    def get_king_safety(self, color: PieceColor):
+        """Find the pieces checking and pinned against the king of a color.
+
+        Returns the checking pieces, the squares a piece can move to in order to
+        stop a single check, and a dict of the squares each pinned piece is
+        allowed to move to.
+        """
+        king = self.get_king(color)
+        checkers = []
+        evasions = set()
+        pins = {}
+
+        if king is None:
+            return checkers, evasions, pins
+
+        squares = self.squares
+        index = king.pos.index
+
+        for target in KNIGHT_TARGETS[index]:
+            piece = squares[target].piece
+            if piece is not None and piece.color != color and piece.type == PieceType.KNIGHT:
+                checkers.append(piece)
+                evasions.add(target)
+
+        for target in PAWN_ATTACKS[color][index]:
+            piece = squares[target].piece
+            if piece is not None and piece.color != color and piece.type == PieceType.PAWN:
+                checkers.append(piece)
+                evasions.add(target)
+
+        for direction in QUEEN_DIRECTIONS:
+            ray = []
+            pinned = None
+
+            for target in RAYS[direction][index]:
+                ray.append(target)
+                piece = squares[target].piece
+
+                if piece is None:
+                    continue
+
+                if piece.color == color:
+                    # A second piece of our own color can't be pinned
+                    if pinned is not None:
+                        break
+
+                    pinned = piece
+                    continue
+
+                if piece.type in SLIDING_TYPES[direction]:
+                    if pinned is None:
+                        checkers.append(piece)
+                        evasions.update(ray)
+                    else:
+                        pins[pinned] = set(ray)
+                break
+
+        return checkers, evasions, pins
+
+    def get_legal_moves(self, color: PieceColor):
+        """Get the legal moves of every piece of a color."""
+        if self.bitboards is not None:
+            return {piece: self.bitboards.get_positions(targets)
+                    for piece, targets in self.bitboards.get_legal_targets(color).items()}
+
+        safety = self.get_king_safety(color)
+
+        return {piece: piece.check_moves(piece.get_moves(ignore_check=True), safety)
+                for piece in self.get_pieces(color)}
+
+    def get_cached_moves(self):
+        """Get the legal moves of the side to move, by the index of the square each piece is on.
+
+        Results are kept for the most recently used positions. The cache is keyed
+        by the position's hash, so once a move is made the old entry simply stops
+        matching, and going back to a position finds its moves again.
+        """
+        moves = self.move_cache.get(self.hash)
+
+        if moves is not None:
+            self.move_cache.move_to_end(self.hash)
+            return moves
+
+        moves = {piece.pos.index: piece_moves
+                 for piece, piece_moves in self.get_legal_moves(self.move % 2).items()}
+
+        self.move_cache[self.hash] = moves
+        if len(self.move_cache) > self.move_cache_size:
+            self.move_cache.popitem(last=False)
+
+        return moves
+
+    def count_legal_moves(self, color: PieceColor):
+        """Count the legal moves of a color, each promotion counting once per piece
+        it can promote to."""
+        if self.bitboards is not None:
+            return self.bitboards.count_moves(color)
+
+        count = 0
+
+        for piece, moves in self.get_legal_moves(color).items():
+            count += len(moves)
+
+            if piece.type == PieceType.PAWN:
+                count += 3 * sum(1 for pos in moves if pos.y in [0, 7])
+
+        return count
+
+    def has_legal_move(self, color: PieceColor):
+        """Check if a color has any legal move, stopping at the first one found."""
+        if self.bitboards is not None:
+            return any(self.bitboards.get_legal_targets(color).values())
+
+        checkers, evasions, pins = safety = self.get_king_safety(color)
+        king = self.get_king(color)
+
+        # King steps are the cheapest to test and the only escape from double check
+        if king is not None:
+            if king.check_moves(king.get_target_moves(KING_TARGETS), safety):
+                return True
+
+            if len(checkers) > 1:
+                return False
+
+        # Then try capturing a single checking piece
+        if checkers:
+            checker = checkers[0]
+
+            for piece in self.get_attackers(checker.pos.index, color):
+                if piece is not king and (piece not in pins or checker.pos.index in pins[piece]):
+                    return True
+
+        for piece in self.get_pieces(color):
+            if piece is not king and piece.check_moves(piece.get_moves(ignore_check=True), safety):
+                return True
+
+        return False
+
     def check_checked(self):
-        """Check if either king is in check."""
-        if not self.black_king is None:
-            self.black_king.check_checked()
+        """Update check, checkmate and stalemate for both kings.
 
-        if not self.white_king is None:
-            self.white_king.check_checked()
+        Called once after each move. The legal moves of the side to move are
+        generated here and cached, so selecting, highlighting and validating
+        moves until the next move all reuse them.
+        """
+        has_moves = any(self.get_cached_moves().values())
 
-        self.check_checkmate()
+        for king in [self.black_king, self.white_king]:
+            if king is None:
+                continue
 
-    def check_checkmate(self):
-        """Check if either king is in checkmate."""
-        if not self.black_king is None:
-            self.black_king.check_checkmate()
+            king.check_checked()
 
-        if not self.white_king is None:
-            self.white_king.check_checkmate()
+            if king.color == self.move % 2:
+                king.checkmate = king.in_check and not has_moves
+                king.stalemate = not king.in_check and not has_moves
+            else:
+                # The side that just moved can't be out of moves
+                king.checkmate = False
+                king.stalemate = False
 
 
 class Position:
     """Represents a square on the board."""
 
-    def __init__(self, x: int, y: int, size: int, board: Board):
+    def __init__(self, x: int, y: int, board: Board):
         self.x = x
         self.y = y
-        self.size = size
+        self.index = y * 8 + x
         self.board = board
 
-        self.selected = False
-        self.hovered = False
-
-        self.piece = None
+        self._piece = None
 
     @property
-    def rect(self):
-        return pygame.Rect(self.x * self.size, self.y * self.size, self.size, self.size)
+    def piece(self):
+        """The piece standing on this position."""
+        return self._piece
+
+    @piece.setter
+    def piece(self, value: 'Piece'):
+        board = self.board
+
+        if board.bitboards is not None:
+            board.bitboards.update(self.index, self._piece, value)
+
+        if self._piece is not None:
+            board.hash ^= PIECE_KEYS[self._piece.color, self._piece.type][self.index]
+
+        if value is not None:
+            board.hash ^= PIECE_KEYS[value.color, value.type][self.index]
+
+        self._piece = value
 
     def __repr__(self):
         return f"Position({self.x}, {self.y})"
 
+    @property
+    def name(self):
+        """The algebraic name of the square, like e4."""
+        return "abcdefgh"[self.x] + str(8 - self.y)
+
     def __eq__(self, other: 'Position'):
         return self.x == other.x and self.y == other.y
 
-    def draw(self, screen: pygame.Surface):
-        """Draw the position with its piece and highlight."""
-        # Check white or black
-        if self.x % 2 == self.y % 2:
-            color = Colors.WHITE
-        else:
-            color = Colors.DARK_GRAY
-
-        # Draw the square
-        pygame.draw.rect(screen, color, self.rect)
-
-        if self.selected:
-            # Draw partially transparent square
-            surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-            surface.fill(TransparentColors.YELLOW)
-            screen.blit(surface, self.rect)
-
-            if self.piece is not None:
-                for pos in self.piece.get_moves():
-                    pos.hovered = True
-
-        if self.hovered:
-            if self.piece is None:
-                surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-                surface.fill(TransparentColors.BLUE)
-                screen.blit(surface, self.rect)
-            else:
-                surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-                surface.fill(TransparentColors.RED)
-                screen.blit(surface, self.rect)
-
-        if self.piece is not None:
-            if self.piece.type == PieceType.KING:
-                if self.piece.in_check and not self.piece.checkmate:
-                    surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-                    surface.fill(TransparentColors.DARK_RED)
-                    screen.blit(surface, self.rect)
-                elif self.piece.checkmate:
-                    surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-                    surface.fill(TransparentColors.DARK_GRAY5)
-                    screen.blit(surface, self.rect)
-
-            # Draw piece in the center of the square
-            screen.blit(self.piece.image, (self.rect.centerx - self.piece.image.get_width() //
-                        2, self.rect.centery - self.piece.image.get_height() // 2))
-
-        self.hovered = False
-
-    def handle_click(self):
-        """Handle a click on the position."""
-        if self.piece is None:
-            if self.board.selected_pos is None:
-                if self.selected:
-                    self.board.selected_pos = None
-                else:
-                    self.board.selected_pos = self
-                return
-            elif self in self.board.selected_pos.get_moves():
-                self.board.selected_pos.move(self)
-                self.board.selected_pos = None
-                return
-            else:
-                if self.selected:
-                    self.board.selected_pos = None
-                else:
-                    self.board.selected_pos = self
-        else:
-            if self.board.selected_pos is None:
-                self.board.selected_pos = self
-                return
-            elif self in self.board.selected_pos.get_moves():
-                self.board.selected_pos.move(self)
-                self.board.selected_pos = None
-                return
-            else:
-                if self.selected:
-                    self.board.selected_pos = None
-                else:
-                    self.board.selected_pos = self
-
     def get_moves(self):
         """Get all possible moves for the piece at this position."""
         if self.piece is None:
             return []
         return self.piece.get_moves()
 
-    def move(self, pos: 'Position'):
+    def move(self, pos: 'Position', promotion: PieceType = None):
         """Move the piece to a new position."""
         if self.piece == None:
             raise ValueError("No piece to move")
 
-        self.piece.move(pos)
+        self.board.make_move(self.piece, pos, promotion)
 
-        self.board.move += 1
+        self.board.check_checked()
 
     def get_relative(self, x_offset, y_offset):
         """Get the position relative to this one."""
@@ -237,25 +662,14 @@ class Position:
 
 class Piece:
     """Represents a piece on the board."""
-    black_pieces = []
-    white_pieces = []
-
-    def __init__(self, image: pygame.Surface, color: PieceColor):
-        self.image = image
 
+    def __init__(self, color: PieceColor):
         self.first_move = True
-        self.last_move_turn = 0
 
         self.color = color
 
         self.type = None
 
-        # Add this piece to the public list of pieces
-        if color == PieceColor.BLACK:
-            Piece.black_pieces.append(self)
-        else:
-            Piece.white_pieces.append(self)
-
     def __repr__(self):
         return f"Piece({'WHITE' if self.color == 0 else 'BLACK'} {self.type} at {self.pos})"
 
@@ -269,71 +683,95 @@ class Piece:
         if not value is None:
             self._pos.piece = self
 
-    @property
-    def rect(self):
-        return self.image.get_rect()
-
-    def get_moves(self):
+    def get_moves(self, ignore_check: bool = False):
         """Returns all possible moves for the piece"""
+        if not ignore_check:
+            if self.color != self.pos.board.move % 2:
+                return []
+
+            return self.pos.board.get_cached_moves().get(self.pos.index, [])[:]
+
+        if self.pos.board.bitboards is None:
+            return self.get_pseudo_moves()
+
+        return self.pos.board.bitboards.get_moves(self)
+
+    def get_pseudo_moves(self):
+        """Returns the moves for the piece without checking if they leave the king in check"""
         return []
 
-    def move(self, pos: Position):
-        """Move the piece to a new position."""
+    def get_target_moves(self, targets: list):
+        """Returns the moves to the target squares that aren't blocked by own pieces"""
+        squares = self.pos.board.squares
+        moves = []
+
+        for index in targets[self.pos.index]:
+            pos = squares[index]
+
+            if pos.piece is None or pos.piece.color != self.color:
+                moves.append(pos)
+
+        return moves
+
+    def get_ray_moves(self, directions: list):
+        """Returns the moves along each direction up to the first piece in the way"""
+        squares = self.pos.board.squares
+        moves = []
+
+        for direction in directions:
+            for index in RAYS[direction][self.pos.index]:
+                pos = squares[index]
+
+                if pos.piece is None:
+                    moves.append(pos)
+                    continue
+
+                if pos.piece.color != self.color:
+                    moves.append(pos)
+                break
+
+        return moves
+
+    def move(self, pos: Position, promotion: PieceType = None):
+        """Move the piece to a new position.
+
+        A pawn reaching the last row is promoted to the promotion type, or a
+        queen if it isn't given.
+        """
+        board = self.pos.board
+        rights = board.get_castling_rights()
+
         if pos.piece is not None:
             pos.piece.take()
 
         self.pos.piece = None
         self.pos = pos
-        self.pos.piece = self
 
         self.first_move = False
 
-        self.last_move_turn = self.pos.board.move
-
-        self.pos.board.check_checked()
+        board.en_passant = None
+        board.update_castling_rights(rights)
 
     def take(self):
         """Removes itself from the board"""
         self.pos.piece = None
-        if self.color == PieceColor.WHITE:
-            Piece.white_pieces.remove(self)
-        else:
-            Piece.black_pieces.remove(self)
+        self.pos.board.unregister_piece(self)
 
-    def check_moves(self, moves: list):
+    def check_moves(self, moves: list, safety: tuple = None):
         """Checks if the king will be in check after the move"""
-        if self.color == PieceColor.WHITE:
-            king = self.pos.board.white_king
-            opponent_pieces = Piece.black_pieces[:]
-        else:
-            king = self.pos.board.black_king
-            opponent_pieces = Piece.white_pieces[:]
-
-        valid_moves = []
-
-        original_pos = self.pos
-        self.pos.piece = None
-
-        for pos in moves:
-            original_piece = pos.piece
-            self.pos = pos
+        if safety is None:
+            safety = self.pos.board.get_king_safety(self.color)
 
-            opponent_moves = []
+        checkers, evasions, pins = safety
 
-            if original_piece is not None and original_piece.color != self.color:
-                opponent_pieces.remove(original_piece)
-
-            for piece in opponent_pieces:
-                opponent_moves += piece.get_moves(ignore_check=True)
-
-            if original_piece is not None and original_piece.color != self.color:
-                opponent_pieces.append(original_piece)
-
-            if not king.pos in opponent_moves:
-                valid_moves.append(pos)
+        # Only the king can get out of double check
+        if len(checkers) > 1:
+            return []
 
-            pos.piece = original_piece
+        if checkers:
+            moves = [pos for pos in moves if pos.index in evasions]
 
-        self.pos = original_pos
+        if self in pins:
+            moves = [pos for pos in moves if pos.index in pins[self]]
 
-        return valid_moves
+        return moves
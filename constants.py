@@ -91,3 +91,9 @@ class PieceType:
 class PositionStuff:
     """Don't judge couldn't come up with a better name"""
     PIECE_SIZE = 60
+
+
+class Backend:
+    """The board representation used to generate moves"""
+    OBJECTS = "OBJECTS"
+    BITBOARD = "BITBOARD"
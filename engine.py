@@ -0,0 +1,408 @@
+import argparse
+import queue
+import threading
+import time
+from board import STARTING_FEN, Board
+from constants import PieceColor, PieceType
+from perft import get_move_name, get_moves
+from tables import PAWN_STEPS
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, encode_move
+
+PIECE_VALUES = {PieceType.PAWN: 100, PieceType.KNIGHT: 320, PieceType.BISHOP: 330,
+                PieceType.ROOK: 500, PieceType.QUEEN: 900, PieceType.KING: 0}
+
+# Scores past MATE_SCORE - MAX_PLY mean a forced mate was found
+MATE_SCORE = 100000
+MAX_PLY = 100
+
+# Nodes searched between looking at the clock, a few milliseconds at the
+# speed the engine searches
+CHECK_INTERVAL = 64
+
+
+def _center_table():
+    """A bonus for each square by how close it is to the center of the board"""
+    return [6 - int(abs(index % 8 - 3.5) + abs(index // 8 - 3.5)) for index in range(64)]
+
+
+# Knights and bishops are worth more in the center, pawns as they advance
+CENTER_BONUS = _center_table()
+PAWN_BONUS = [[(7 - index // 8) * 5 for index in range(64)],
+              [(index // 8) * 5 for index in range(64)]]
+
+
+def score_to_table(score: int, ply: int):
+    """Make a mate score count from the position being stored instead of the root."""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int):
+    """Undo score_to_table for a position found at a ply."""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class SearchStopped(Exception):
+    """Raised inside a search when it has to stop early."""
+
+
+def evaluate(board: Board):
+    """Score the position in centipawns, from the side to move's point of view."""
+    score = 0
+
+    for color, sign in [(PieceColor.WHITE, 1), (PieceColor.BLACK, -1)]:
+        for piece in board.get_pieces(color):
+            value = PIECE_VALUES[piece.type]
+            index = piece.pos.index
+
+            if piece.type == PieceType.PAWN:
+                value += PAWN_BONUS[color][index]
+            elif piece.type in [PieceType.KNIGHT, PieceType.BISHOP]:
+                value += CENTER_BONUS[index] * 5
+
+            score += sign * value
+
+    return score if board.move % 2 == PieceColor.WHITE else -score
+
+
+def in_check(board: Board):
+    """Check if the side to move is in check."""
+    color = board.move % 2
+    king = board.get_king(color)
+
+    return king is not None and board.is_attacked(king.pos.index, 1 - color)
+
+
+def get_captured(board: Board, move: tuple):
+    """Get the piece a move takes, if it takes one."""
+    piece, pos, promotion = move
+
+    if pos.piece is not None:
+        return pos.piece
+
+    if piece.type == PieceType.PAWN and pos is board.en_passant:
+        return board.squares[pos.index - PAWN_STEPS[piece.color]].piece
+
+    return None
+
+
+def order_moves(board: Board, moves: list):
+    """Sort moves so the ones most likely to be good are searched first.
+
+    Captures come first, the most valuable victim taken by the least valuable
+    attacker first (MVV-LVA), followed by promotions and then quiet moves.
+    """
+    def score(move):
+        piece, pos, promotion = move
+        captured = get_captured(board, move)
+        value = 0
+
+        if captured is not None:
+            value += 10 * PIECE_VALUES[captured.type] - PIECE_VALUES[piece.type] + 10000
+
+        if promotion is not None:
+            value += PIECE_VALUES[promotion]
+
+        return value
+
+    return sorted(moves, key=score, reverse=True)
+
+
+class Engine:
+    """Searches for the best move with alpha-beta and iterative deepening."""
+
+    def __init__(self, table: TranspositionTable = None):
+        self.nodes = 0
+        self.deadline = None
+        self.stopped = False
+
+        # Can be shared between engines to keep what was learned between searches
+        self.table = table if table is not None else TranspositionTable()
+
+    def stop(self):
+        """Make the search return the best move found so far.
+
+        A search started after this stops straight away, until stopped is
+        set back to False.
+        """
+        self.stopped = True
+
+    def check_time(self):
+        """Stop the search if it was asked to or it ran out of time."""
+        if self.stopped or (self.deadline is not None and time.perf_counter() >= self.deadline):
+            raise SearchStopped()
+
+    def search(self, board: Board, depth: int = MAX_PLY, time_limit: float = None, callback=None):
+        """Find the best move for the side to move.
+
+        Searches one ply deeper at a time until the depth is reached, the time
+        limit in seconds runs out or stop is called. The callback is given a
+        dict describing each finished depth.
+
+        Returns the best move as (piece, position, promotion) and its score,
+        the move is None if there are no legal moves.
+        """
+        self.nodes = 0
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+        start = time.perf_counter()
+        moves = order_moves(board, get_moves(board))
+
+        if not moves:
+            return None, -MATE_SCORE if in_check(board) else 0
+
+        best = moves[0]
+        score = 0
+
+        for current_depth in range(1, depth + 1):
+            undo_length = len(board.undo_stack)
+
+            try:
+                score, best = self.search_root(board, moves, current_depth)
+            except SearchStopped:
+                # Take back the moves the search was in the middle of
+                while len(board.undo_stack) > undo_length:
+                    board.unmake_move()
+                break
+
+            # The best move so far is searched first on the next depth
+            moves.remove(best)
+            moves.insert(0, best)
+
+            if callback is not None:
+                seconds = time.perf_counter() - start
+                callback({"depth": current_depth, "score": score, "nodes": self.nodes,
+                          "seconds": seconds, "move": get_move_name(*best),
+                          "hashfull": self.table.get_stats()["hashfull"]})
+
+            # Searching deeper won't find a faster mate
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+
+        return best, score
+
+    def search_root(self, board: Board, moves: list, depth: int):
+        """Search every move at the root, returning the best score and move."""
+        alpha = -MATE_SCORE
+        best = moves[0]
+
+        for move in moves:
+            board.make_move(*move)
+            score = -self.negamax(board, depth - 1, -MATE_SCORE, -alpha, 1)
+            board.unmake_move()
+
+            if score > alpha:
+                alpha = score
+                best = move
+
+        return alpha, best
+
+    def negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int):
+        """Score a position by searching the moves below it to a depth."""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_time()
+
+        if ply > 0 and (board.halfmove_clock >= 100 or self.is_repetition(board)):
+            return 0
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiesce(board, alpha, beta, ply)
+
+        key = board.hash
+        entry = self.table.probe(key)
+        hash_move = 0
+
+        if entry is not None:
+            entry_depth, flag, score, hash_move = entry
+            score = score_from_table(score, ply)
+
+            # A search at least as deep already settled this position
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return min(max(score, alpha), beta)
+                if flag == LOWER and score >= beta:
+                    return beta
+                if flag == UPPER and score <= alpha:
+                    return alpha
+
+        moves = get_moves(board)
+
+        if not moves:
+            return -MATE_SCORE + ply if in_check(board) else 0
+
+        moves = order_moves(board, moves)
+
+        # The best move found last time is the most likely to be best again
+        if hash_move:
+            for index, move in enumerate(moves):
+                if encode_move(move) == hash_move:
+                    moves.insert(0, moves.pop(index))
+                    break
+
+        best_move = 0
+
+        for move in moves:
+            encoded = encode_move(move)
+
+            board.make_move(*move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score >= beta:
+                self.table.store(key, depth, LOWER, score_to_table(beta, ply), encoded)
+                return beta
+
+            if score > alpha:
+                alpha = score
+                best_move = encoded
+
+        self.table.store(key, depth, EXACT if best_move else UPPER,
+                         score_to_table(alpha, ply), best_move)
+
+        return alpha
+
+    def quiesce(self, board: Board, alpha: int, beta: int, ply: int):
+        """Search captures until the position is quiet, so the evaluation isn't
+        taken in the middle of an exchange."""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_time()
+
+        # The side to move can usually do at least as well as standing still
+        stand_pat = evaluate(board)
+
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        captures = [move for move in get_moves(board)
+                    if get_captured(board, move) is not None
+                    or move[2] == PieceType.QUEEN]
+
+        for move in order_moves(board, captures):
+            board.make_move(*move)
+            score = -self.quiesce(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score >= beta:
+                return beta
+
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+    def is_repetition(self, board: Board):
+        """Check if the position was already reached since the last capture or pawn move."""
+        clock = board.halfmove_clock
+
+        # The undo stack holds the hash from before each move, every second
+        # one is from when the same side was to move
+        for entry in board.undo_stack[-2:-clock - 1:-2]:
+            if entry[-1] == board.hash:
+                return True
+
+        return False
+
+
+class SearchThread:
+    """Searches a position in a background thread.
+
+    The search runs on its own board loaded from the position's FEN, so the
+    game's board can keep being drawn and clicked while it thinks. Each
+    finished depth is queued for get_progress, and notify is called from the
+    search's thread whenever there is something new to look at.
+    """
+
+    def __init__(self, board: Board, depth: int = MAX_PLY, time_limit: float = None, notify=None,
+                 table: TranspositionTable = None):
+        self.fen = board.get_fen()
+        self.depth = depth
+        self.time_limit = time_limit
+        self.notify = notify
+
+        self.engine = Engine(table)
+        self.progress = queue.Queue()
+
+        # The name of the best move and its score, once the search is done
+        self.result = None
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        board = Board()
+        board.load_fen(self.fen)
+
+        def callback(info):
+            self.progress.put(info)
+            if self.notify is not None:
+                self.notify()
+
+        move, score = self.engine.search(board, self.depth, self.time_limit, callback)
+        self.result = (get_move_name(*move) if move is not None else None, score)
+
+        if self.notify is not None:
+            self.notify()
+
+    def get_progress(self):
+        """Get the info of each depth finished since the last call."""
+        infos = []
+
+        while True:
+            try:
+                infos.append(self.progress.get_nowait())
+            except queue.Empty:
+                return infos
+
+    def is_done(self):
+        """Check if the search finished and its result is ready."""
+        return not self.thread.is_alive()
+
+    def cancel(self):
+        """Stop the search and wait for it to finish.
+
+        Waiting means a transposition table shared with the next search is
+        never written to by two searches at once.
+        """
+        self.engine.stop()
+        self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a position for the best move.")
+    parser.add_argument("--fen", default=STARTING_FEN,
+                        help="position to search, the starting position by default")
+    parser.add_argument("--depth", type=int, default=MAX_PLY)
+    parser.add_argument("--time", type=float, default=5,
+                        help="seconds to search for")
+    parser.add_argument("--hash", type=float, default=16,
+                        help="megabytes of memory for the transposition table")
+    args = parser.parse_args()
+
+    board = Board()
+    board.load_fen(args.fen)
+
+    def show(info):
+        print("depth {depth} score {score} nodes {nodes} time {seconds:.3f}s best {move}".format(**info))
+
+    engine = Engine(TranspositionTable(args.hash))
+    move, score = engine.search(board, args.depth, args.time, show)
+
+    print("Table: {probes} probes, {hits} hits ({hit_rate:.1%}), {stores} stores, "
+          "{overwrites} overwrites, {hashfull} per mille full".format(**engine.table.get_stats()))
+    print(f"Best move: {get_move_name(*move) if move is not None else '(none)'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,40 @@
+import argparse
 import pygame
 from board import Board
-from pieces import Bishop, Knight, Pawn, Queen, Rook, King
 from constants import PieceColor
+from engine import SearchThread
+from perft import find_move
+from pieces import setup_board
+from polyglot import OpeningBook
+from transposition import TranspositionTable
+from view import BoardView
+
+# Posted by searches running in the background, to wake up the game loop
+ENGINE_EVENT = pygame.USEREVENT
 
 
 class Game:
     """Handles the basic game functions"""
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, fps=None, computer=None, think_time=2, analysis=False,
+                 book=None):
         self.WIDTH = width // 8 * 8  # Round down to multiple of 8
         self.HEIGHT = height // 8 * 8
 
+        # Without a frame rate the game sleeps until there is an event to
+        # handle, set one to keep drawing frames for animations
+        self.fps = fps
+
+        # The color the engine plays, if any, and how long it has for each move
+        self.computer = computer
+        self.think_time = think_time
+
+        # Whether to show the engine's opinion of the position on the human's turn
+        self.analysis = analysis
+
+        # The path of a Polyglot opening book for the engine to play from
+        self.book_path = book
+
     def run(self):
         """Run the game"""
         self.setup()
@@ -23,77 +47,151 @@ class Game:
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         self.clock = pygame.time.Clock()
 
-        self.board = Board(0, 0, self.HEIGHT)
-
-        self.board.add_piece(Pawn(PieceColor.WHITE), (0, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (1, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (2, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (3, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (4, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (5, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (6, 6))
-        self.board.add_piece(Pawn(PieceColor.WHITE), (7, 6))
-
-        self.board.add_piece(Pawn(PieceColor.BLACK), (0, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (1, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (2, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (3, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (4, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (5, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (6, 1))
-        self.board.add_piece(Pawn(PieceColor.BLACK), (7, 1))
-
-        self.board.add_piece(Rook(PieceColor.WHITE), (0, 7))
-        self.board.add_piece(Rook(PieceColor.WHITE), (7, 7))
+        self.board = Board()
+        setup_board(self.board)
 
-        self.board.add_piece(Rook(PieceColor.BLACK), (0, 0))
-        self.board.add_piece(Rook(PieceColor.BLACK), (7, 0))
+        self.view = BoardView(self.board, 0, 0, self.HEIGHT)
 
-        self.board.add_piece(Knight(PieceColor.WHITE), (1, 7))
-        self.board.add_piece(Knight(PieceColor.WHITE), (6, 7))
-
-        self.board.add_piece(Knight(PieceColor.BLACK), (1, 0))
-        self.board.add_piece(Knight(PieceColor.BLACK), (6, 0))
+        self.screen.fill((0, 0, 0))
+        pygame.display.update()
 
-        self.board.add_piece(Bishop(PieceColor.WHITE), (2, 7))
-        self.board.add_piece(Bishop(PieceColor.WHITE), (5, 7))
+        # Only wake up for the events that can change what is drawn
+        if self.fps is None:
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONDOWN,
+                                      pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED,
+                                      ENGINE_EVENT])
 
-        self.board.add_piece(Bishop(PieceColor.BLACK), (2, 0))
-        self.board.add_piece(Bishop(PieceColor.BLACK), (5, 0))
+        # The search running in the background, and the move it was started on
+        self.search = None
+        self.search_move = None
 
-        self.board.add_piece(Queen(PieceColor.WHITE), (3, 7))
-        self.board.add_piece(Queen(PieceColor.BLACK), (3, 0))
+        # Shared by every search, so each move starts with what the last one learned
+        self.table = TranspositionTable()
 
-        self.board.add_piece(King(PieceColor.WHITE), (4, 7))
-        self.board.add_piece(King(PieceColor.BLACK), (4, 0))
+        self.book = OpeningBook(self.book_path) if self.book_path is not None else None
 
         self.running = True
 
     def loop(self):
         """Run the game loop"""
+        # Show the board and start the engine before waiting for the first event,
+        # any expose events were dropped when the event types were blocked
+        self.update_search()
+        self.draw()
+
         while self.running:
             self.update()
             self.draw()
 
+        if self.search is not None:
+            self.search.cancel()
+
+        if self.book is not None:
+            self.book.close()
+
     def update(self):
         """Handle user events for each frame"""
-        for event in pygame.event.get():
+        if self.fps is None:
+            # Block until something happens, then handle everything that did
+            events = [pygame.event.wait()] + pygame.event.get()
+        else:
+            events = pygame.event.get()
+
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                self.board.handle_click(event.pos)
+            # The engine's pieces aren't the player's to move
+            if event.type == pygame.MOUSEBUTTONDOWN and self.board.move % 2 != self.computer:
+                self.view.handle_click(event.pos)
+
+            # The window's contents were lost, so everything has to be drawn again
+            if event.type in [pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]:
+                self.view.redraw()
+
+        self.update_search()
+
+    def update_search(self):
+        """Play the engine's move once it is found, and start searching after each move."""
+        color = self.board.move % 2
+
+        if self.search is not None:
+            for info in self.search.get_progress():
+                # Scores are from the side to move's point of view, show them as white's
+                score = info["score"] if color == PieceColor.WHITE else -info["score"]
+                pygame.display.set_caption(
+                    f"Chess - depth {info['depth']}, {score / 100:+.2f}, best {info['move']}")
+
+            if self.search.is_done() and self.search_move == self.board.move and color == self.computer:
+                name, score = self.search.result
+                self.search = None
+                self.play_move(name)
+
+        if self.search_move == self.board.move:
+            return
+
+        # A move was made, so the old search is out of date
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+
+        self.search_move = self.board.move
+
+        king = self.board.get_king(self.board.move % 2)
+        if king is None or king.checkmate or king.stalemate:
+            return
+
+        if self.board.move % 2 == self.computer:
+            # Book moves are played straight away, then the next position is handled
+            name = self.book.choose_move(self.board) if self.book is not None else None
+            if name is not None:
+                self.play_move(name)
+                self.update_search()
+                return
+
+            self.search = SearchThread(self.board, time_limit=self.think_time,
+                                       notify=self.wake_up, table=self.table)
+        elif self.analysis:
+            self.search = SearchThread(self.board, notify=self.wake_up, table=self.table)
+
+    def play_move(self, name: str):
+        """Make the move with a name like e2e4 for the engine."""
+        move = find_move(self.board, name)
+
+        if move is not None:
+            piece, pos, promotion = move
+            piece.pos.move(pos, promotion)
+
+    def wake_up(self):
+        """Let the game loop know the search has news, called from the search's thread"""
+        pygame.event.post(pygame.event.Event(ENGINE_EVENT))
 
     def draw(self):
-        """Draw the game to the screen"""
-        self.screen.fill((0, 0, 0))
+        """Draw the parts of the game that changed to the screen"""
+        rects = self.view.draw(self.screen)
 
-        self.board.draw(self.screen)
+        if rects:
+            pygame.display.update(rects)
 
-        pygame.display.update()
-        self.clock.tick(15)
+        if self.fps is not None:
+            self.clock.tick(self.fps)
 
 
 if __name__ == '__main__':
-    game = Game(600, 600)
+    parser = argparse.ArgumentParser(description="Play chess.")
+    parser.add_argument("--computer", choices=["white", "black"],
+                        help="let the engine play a color")
+    parser.add_argument("--think-time", type=float, default=2,
+                        help="seconds the engine has for each move")
+    parser.add_argument("--analysis", action="store_true",
+                        help="show the engine's opinion of the position while you think")
+    parser.add_argument("--book", help="a Polyglot opening book for the engine to play from")
+    parser.add_argument("--fps", type=int,
+                        help="draw at a fixed frame rate instead of only when something changes")
+    args = parser.parse_args()
+
+    computer = {"white": PieceColor.WHITE, "black": PieceColor.BLACK, None: None}[args.computer]
+
+    game = Game(600, 600, args.fps, computer, args.think_time, args.analysis, args.book)
     game.run()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import sys
+import time
+from board import PIECE_LETTERS, STARTING_FEN, Board
+from constants import Backend, PieceType
+from pieces import PROMOTION_TYPES
+
+# Positions with known move counts, used to check the move generator
+# against. Counts are from the Chess Programming Wiki's perft results.
+REFERENCE_POSITIONS = [
+    ("start", STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+]
+
+# Depths used by the benchmark, picked to take a few seconds in total
+BENCHMARK_DEPTHS = {"start": 4, "kiwipete": 3, "position 3": 4,
+                    "position 4": 3, "position 5": 3}
+
+
+def get_moves(board: Board):
+    """List every legal move for the side to move as (piece, position, promotion)."""
+    moves = []
+
+    for piece, targets in board.get_legal_moves(board.move % 2).items():
+        for pos in targets:
+            if piece.type == PieceType.PAWN and pos.y in [0, 7]:
+                moves += [(piece, pos, promotion) for promotion in PROMOTION_TYPES]
+            else:
+                moves.append((piece, pos, None))
+
+    return moves
+
+
+def perft(board: Board, depth: int):
+    """Count the positions reached after every sequence of legal moves of a given length."""
+    if depth == 0:
+        return 1
+
+    # The last ply only has to be counted, not played
+    if depth == 1:
+        return board.count_legal_moves(board.move % 2)
+
+    moves = get_moves(board)
+
+    nodes = 0
+
+    for piece, pos, promotion in moves:
+        board.make_move(piece, pos, promotion)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+
+    return nodes
+
+
+def get_move_name(piece, pos, promotion: PieceType = None):
+    """Name a move by its start and end squares, like e2e4 or e7e8q."""
+    name = piece.pos.name + pos.name
+
+    if promotion is not None:
+        name += next(letter for letter, piece_type in PIECE_LETTERS.items()
+                     if piece_type == promotion)
+
+    return name
+
+
+def find_move(board: Board, name: str):
+    """Find the legal move with a name like e2e4 or e7e8q, None if there isn't one."""
+    for move in get_moves(board):
+        if get_move_name(*move) == name:
+            return move
+
+    return None
+
+
+def divide(board: Board, depth: int):
+    """Run perft for each legal move, keyed by the move's name like e2e4 or e7e8q."""
+    results = {}
+
+    for piece, pos, promotion in get_moves(board):
+        name = get_move_name(piece, pos, promotion)
+
+        board.make_move(piece, pos, promotion)
+        results[name] = perft(board, depth - 1)
+        board.unmake_move()
+
+    return results
+
+
+def run_benchmark(depths: dict, backend: Backend = Backend.OBJECTS):
+    """Run perft on the reference positions, checking counts and timing each one."""
+    results = []
+
+    for name, fen, counts in REFERENCE_POSITIONS:
+        depth = depths[name]
+        board = Board(backend)
+        board.load_fen(fen)
+
+        start = time.perf_counter()
+        nodes = perft(board, depth)
+        seconds = time.perf_counter() - start
+
+        results.append({"name": name, "backend": backend, "depth": depth, "nodes": nodes,
+                        "expected": counts[depth - 1], "seconds": seconds,
+                        "nps": nodes / seconds if seconds > 0 else 0})
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count and time move generation with perft.")
+    parser.add_argument("--fen", default=REFERENCE_POSITIONS[0][1],
+                        help="position to search, the starting position by default")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", choices=[Backend.OBJECTS, Backend.BITBOARD],
+                        default=Backend.OBJECTS, type=str.upper,
+                        help="the board representation to generate moves with")
+    parser.add_argument("--divide", action="store_true",
+                        help="show the count below each legal move")
+    parser.add_argument("--bench", action="store_true",
+                        help="check and time every reference position")
+    parser.add_argument("--output", default="perft_results.json",
+                        help="where --bench writes its results")
+    parser.add_argument("--baseline",
+                        help="results of an earlier --bench run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="largest allowed drop in nodes per second from the baseline")
+    args = parser.parse_args()
+
+    if args.bench:
+        results = run_benchmark(BENCHMARK_DEPTHS, args.backend)
+
+        with open(args.output, "w") as file:
+            json.dump({"time": time.time(), "results": results}, file, indent=4)
+
+        baseline = {}
+        if args.baseline:
+            with open(args.baseline) as file:
+                baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+        failed = False
+
+        for result in results:
+            message = "{name} depth {depth}: {nodes} nodes in {seconds:.3f}s ({nps:.0f} nodes/s)".format(
+                **result)
+
+            if result["nodes"] != result["expected"]:
+                message += f" WRONG, expected {result['expected']}"
+                failed = True
+
+            old = baseline.get(result["name"])
+            if old is not None and result["nps"] < old["nps"] * (1 - args.max_regression):
+                message += f" SLOWER than baseline {old['nps']:.0f} nodes/s"
+                failed = True
+
+            print(message)
+
+        sys.exit(1 if failed else 0)
+
+    board = Board(args.backend)
+    board.load_fen(args.fen)
+
+    start = time.perf_counter()
+
+    if args.divide:
+        results = divide(board, args.depth)
+        for name, count in sorted(results.items()):
+            print(f"{name}: {count}")
+        nodes = sum(results.values())
+    else:
+        nodes = perft(board, args.depth)
+
+    seconds = time.perf_counter() - start
+
+    print(f"Nodes: {nodes}")
+    print(f"Time: {seconds:.3f}s ({nodes / seconds if seconds > 0 else 0:.0f} nodes/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import re
+import sys
+from board import PIECE_LETTERS, STARTING_FEN, Board
+from constants import PieceColor, PieceType
+from pieces import PROMOTION_TYPES
+
+# Games are read and replayed one at a time, so files of any size can be
+# checked while only ever holding a single game in memory.
+
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+
+HEADER_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+
+
+class IllegalMoveError(ValueError):
+    """Raised when a move in SAN can't be played in the position."""
+
+
+def ends_in_comment(line: str, in_comment: bool):
+    """Check if a line of movetext leaves a {...} comment open.
+
+    Braces don't nest, and a { after a ; is part of that comment instead.
+    """
+    for char in line:
+        if in_comment:
+            in_comment = char != "}"
+        elif char == "{":
+            in_comment = True
+        elif char == ";":
+            break
+
+    return in_comment
+
+
+def read_games(file):
+    """Yield the headers and movetext of each game in a PGN file.
+
+    The file is read a line at a time, and each game is yielded as soon as the
+    next one starts.
+    """
+    headers = {}
+    movetext = []
+
+    # Comments can run over several lines, and their lines are never headers
+    in_comment = False
+
+    for line in file:
+        line = line.strip()
+
+        if not in_comment:
+            # Lines starting with % are escaped and ignored
+            if line.startswith("%"):
+                continue
+
+            if line.startswith("["):
+                # Headers after movetext belong to the next game
+                if movetext:
+                    yield headers, "\n".join(movetext)
+                    headers = {}
+                    movetext = []
+
+                match = HEADER_PATTERN.match(line)
+                if match:
+                    headers[match.group(1)] = match.group(2)
+                continue
+
+        if line:
+            movetext.append(line)
+            in_comment = ends_in_comment(line, in_comment)
+
+    if headers or movetext:
+        yield headers, "\n".join(movetext)
+
+
+def read_moves(movetext: str):
+    """Yield the moves of the main line of a game's movetext.
+
+    Comments, variations, move numbers, annotations and the result are
+    skipped.
+    """
+    depth = 0
+    index = 0
+
+    while index < len(movetext):
+        char = movetext[index]
+
+        if char == "{":
+            end = movetext.find("}", index)
+            index = len(movetext) if end == -1 else end + 1
+            continue
+
+        if char == ";":
+            # Comments to the end of the line
+            end = movetext.find("\n", index)
+            index = len(movetext) if end == -1 else end + 1
+            continue
+
+        if char == "(":
+            depth += 1
+            index += 1
+            continue
+
+        if char == ")":
+            depth -= 1
+            index += 1
+            continue
+
+        if char.isspace():
+            index += 1
+            continue
+
+        end = index
+        while end < len(movetext) and not movetext[end].isspace() and movetext[end] not in "{;()":
+            end += 1
+
+        token = movetext[index:end]
+        index = end
+
+        if depth > 0 or token.startswith("$") or token in RESULTS:
+            continue
+
+        # Move numbers can be written against the move, like 12.e4 or 12...e5
+        token = token.lstrip("0123456789").lstrip(".")
+        token = token.rstrip("+#!?")
+
+        if token:
+            yield token
+
+
+def parse_san(board: Board, san: str):
+    """Find the legal move written in SAN for the side to move.
+
+    Returns the piece, the position it moves to and the promotion type, and
+    raises an IllegalMoveError if no legal move or more than one matches.
+    """
+    color = board.move % 2
+    king = board.get_king(color)
+
+    if san.replace("0", "O") in ["O-O", "O-O-O"]:
+        if king is None:
+            raise IllegalMoveError(f"{san}: there is no king to castle with")
+
+        step = 2 if san.count("-") == 1 else -2
+        candidates = [(king, board.squares[king.pos.index + step], None)] \
+            if 0 <= king.pos.index + step < 64 else []
+    else:
+        match = SAN_PATTERN.match(san)
+        if match is None:
+            raise IllegalMoveError(f"{san}: not a move")
+
+        letter, file, rank, target, promotion = match.groups()
+
+        piece_type = PIECE_LETTERS[letter.lower()] if letter else PieceType.PAWN
+        pos = board.board[8 - int(target[1])]["abcdefgh".index(target[0])]
+
+        if promotion is not None:
+            promotion = PIECE_LETTERS[promotion.lower()]
+
+        candidates = [(piece, pos, promotion) for piece in board.get_pieces(color, piece_type)
+                      if (file is None or piece.pos.name[0] == file)
+                      and (rank is None or piece.pos.name[1] == rank)]
+
+    # Only the pieces that could reach the square have their moves checked
+    safety = board.get_king_safety(color)
+    moves = [(piece, pos, promotion) for piece, pos, promotion in candidates
+             if pos in piece.check_moves(piece.get_moves(ignore_check=True), safety)]
+
+    if not moves:
+        raise IllegalMoveError(f"{san}: illegal move")
+
+    if len(moves) > 1:
+        raise IllegalMoveError(f"{san}: ambiguous move")
+
+    piece, pos, promotion = moves[0]
+
+    if piece.type == PieceType.PAWN and pos.y in [0, 7]:
+        if promotion not in PROMOTION_TYPES:
+            raise IllegalMoveError(f"{san}: missing promotion")
+    elif promotion is not None:
+        raise IllegalMoveError(f"{san}: only pawns on the last row can promote")
+
+    return piece, pos, promotion
+
+
+def get_status(board: Board):
+    """Describe the position for the side to move as checkmate, stalemate, check or ongoing."""
+    color = board.move % 2
+    king = board.get_king(color)
+
+    if king is None:
+        return "ongoing"
+
+    in_check = board.is_attacked(king.pos.index, 1 - color)
+
+    # Only whether there is a move matters, not what the moves are
+    if board.has_legal_move(color):
+        return "check" if in_check else "ongoing"
+    return "checkmate" if in_check else "stalemate"
+
+
+def replay_game(headers: dict, movetext: str, board: Board = None):
+    """Play a game's moves on a board, stopping at the first illegal one.
+
+    Returns a dict describing the game, with the error set if its FEN couldn't
+    be read or a move couldn't be played.
+    """
+    if board is None:
+        board = Board()
+
+    game = {"white": headers.get("White", "?"), "black": headers.get("Black", "?"),
+            "result": headers.get("Result", "*")}
+    fen = headers.get("FEN", STARTING_FEN)
+
+    try:
+        board.load_fen(fen)
+    except ValueError as e:
+        # There is no position to play the moves from
+        return {**game, "plies": 0, "error": str(e), "status": "no position", "fen": fen}
+
+    plies = 0
+    error = None
+
+    for san in read_moves(movetext):
+        try:
+            board.make_move(*parse_san(board, san))
+        except IllegalMoveError as e:
+            fullmove = board.move // 2 + 1
+            dots = "." if board.move % 2 == PieceColor.WHITE else "..."
+            error = f"{fullmove}{dots} {e}"
+            break
+
+        plies += 1
+
+    return {**game, "plies": plies, "error": error, "status": get_status(board),
+            "fen": board.get_fen()}
+
+
+def replay_file(path: str):
+    """Yield the replay of every game in a PGN file."""
+    # One board is reused for every game, loading a FEN clears it
+    board = Board()
+
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for headers, movetext in read_games(file):
+            yield replay_game(headers, movetext, board)
+
+
+def describe_game(number: int, game: dict):
+    """Summarise a replayed game in one line."""
+    message = "Game {number}, {white} - {black} {result}: {plies} plies, {status}".format(
+        number=number, **game)
+
+    if game["error"] is not None:
+        message += f", ILLEGAL {game['error']}"
+
+    return message
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay the games in a PGN file and report illegal moves.")
+    parser.add_argument("pgn", help="the PGN file to read")
+    parser.add_argument("--all", action="store_true",
+                        help="show every game, not just the ones with illegal moves")
+    args = parser.parse_args()
+
+    games = 0
+    illegal = 0
+
+    for number, game in enumerate(replay_file(args.pgn), 1):
+        games += 1
+
+        if game["error"] is not None:
+            illegal += 1
+
+        if args.all or game["error"] is not None:
+            print(describe_game(number, game))
+
+    print(f"{games} games, {illegal} with illegal moves")
+    sys.exit(1 if illegal else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,7 @@
-from constants import PieceColor, PieceType, PositionStuff
-from board import Position, Piece
-import os
-import pygame
-pygame.font.init()
+from constants import PieceColor, PieceType
+from board import STARTING_FEN, Board, Position, Piece
+from tables import BISHOP_DIRECTIONS, CASTLING_SQUARES, KING_TARGETS, KNIGHT_TARGETS, PAWN_ATTACKS, \
+    PAWN_DIRECTIONS, PAWN_STEPS, QUEEN_DIRECTIONS, RAYS, ROOK_DIRECTIONS
 
 # I'm not about to write doc strings for all of the classes,
 # they all inherit from Piece
@@ -10,629 +9,239 @@ pygame.font.init()
 
 class Pawn(Piece):
     def __init__(self, color: PieceColor):
-
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(os.path.join("images", "white_pawn.png"))
-        else:
-            image = pygame.image.load(os.path.join("images", "black_pawn.png"))
-
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
-
-        super().__init__(image, color)
+        super().__init__(color)
 
         # Pawn specific
-        self.double_moved = False
         self.type = PieceType.PAWN
 
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
-
+    def get_pseudo_moves(self):
+        squares = self.pos.board.squares
         moves = []
 
-        if self.color == PieceColor.WHITE:
-            dir = 1
-        else:
-            dir = -1
-
-            # Forward 1
-        if self.pos.get_relative(0, -1 * dir).piece is None:
-            moves.append(self.pos.get_relative(0, -1 * dir))
-
-        # Forward 2
-            if self.first_move:
-                try:
-                    if self.pos.get_relative(0, -2 * dir).piece is None:
-                        moves.append(self.pos.get_relative(0, -2 * dir))
-                except IndexError:
-                    pass
-
-        # Capture right
-        try:
-            if self.pos.get_relative(1, -1 * dir).piece is not None and \
-                    self.pos.get_relative(1, -1 * dir).piece.color != self.color:
-                moves.append(self.pos.get_relative(1, -1 * dir))
-        except IndexError:
-            pass
-
-        # Capture left
-        try:
-            if self.pos.get_relative(-1, -1 * dir).piece is not None and \
-                    self.pos.get_relative(-1, -1 * dir).piece.color != self.color:
-                moves.append(self.pos.get_relative(-1, -1 * dir))
-        except IndexError:
-            pass
-
-        # En passant right
-        try:
-            if self.pos.get_relative(1, 0).piece is not None and \
-                self.pos.get_relative(1, 0).piece.color != self.color and \
-                self.pos.get_relative(1, 0 * dir).piece.type == PieceType.PAWN and \
-                self.pos.get_relative(1, 0 * dir).piece.double_moved and \
-                    self.pos.get_relative(1, 0 * dir).piece.last_move_turn == self.pos.board.move - 1:
-                moves.append(self.pos.get_relative(1, -1 * dir))
-        except IndexError:
-            pass
-
-        # En passant left
-        try:
-            if self.pos.get_relative(-1, 0).piece is not None and \
-                self.pos.get_relative(-1, 0).piece.color != self.color and \
-                self.pos.get_relative(-1, 0 * dir).piece.type == PieceType.PAWN and \
-                self.pos.get_relative(-1, 0 * dir).piece.double_moved and \
-                    self.pos.get_relative(-1, 0 * dir).piece.last_move_turn == self.pos.board.move - 1:
-                moves.append(self.pos.get_relative(-1, -1 * dir))
-        except IndexError:
-            pass
-
-        if not ignore_check:
-            moves = self.check_moves(moves)
-
-        return moves
+        # Forward 1, then forward 2 on the pawn's first move
+        ray = RAYS[PAWN_DIRECTIONS[self.color]][self.pos.index]
 
-    def move(self, pos: Position):
-        if self.color == PieceColor.WHITE:
-            dir = 1
-        else:
-            dir = -1
+        if ray and squares[ray[0]].piece is None:
+            moves.append(squares[ray[0]])
 
-        if self.first_move:
-            if pos == self.pos.get_relative(0, -2 * dir):
-                self.double_moved = True
+            if self.first_move and len(ray) > 1 and squares[ray[1]].piece is None:
+                moves.append(squares[ray[1]])
 
-        else:
-            self.double_moved = False
+        # Captures
+        for index in PAWN_ATTACKS[self.color][self.pos.index]:
+            piece = squares[index].piece
 
-        # Take piece on en passant
+            if piece is not None and piece.color != self.color:
+                moves.append(squares[index])
 
-        if pos.piece is None:
-            try:
-                if self.pos.get_relative(1, -1 * dir) == pos:
-                    self.pos.get_relative(1, 0).piece.take()
-            except IndexError:
-                pass
+        moves += self.get_en_passant_moves()
 
-            try:
+        return moves
 
-                if self.pos.get_relative(-1, -1 * dir) == pos:
-                    self.pos.get_relative(-1, 0).piece.take()
-            except IndexError:
-                pass
+    def get_en_passant_moves(self):
+        board = self.pos.board
+        target = board.en_passant
 
-        super().move(pos)
+        if target is None or target.index not in PAWN_ATTACKS[self.color][self.pos.index]:
+            return []
 
+        # The pawn that double moved is beside this one, behind the capture square
+        piece = board.squares[target.index - PAWN_STEPS[self.color]].piece
 
-class Rook(Piece):
-    def __init__(self, color: PieceColor):
+        if piece is not None and piece.color != self.color and piece.type == PieceType.PAWN:
+            return [target]
 
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(os.path.join("images", "white_rook.png"))
-        else:
-            image = pygame.image.load(os.path.join("images", "black_rook.png"))
+        return []
 
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
+    def check_moves(self, moves: list, safety: tuple = None):
+        # En passant takes a piece from a different square than the one moved to,
+        # so it is checked by making the capture and looking at the king
+        board = self.pos.board
+        king = board.get_king(self.color)
 
-        super().__init__(image, color)
+        en_passant = []
 
-        # Rook specific
-        self.type = PieceType.ROOK
+        for pos in moves:
+            if pos.piece is None and pos.index in PAWN_ATTACKS[self.color][self.pos.index]:
+                en_passant.append(pos)
 
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
+        if not en_passant:
+            return super().check_moves(moves, safety)
 
-        moves = []
+        valid_moves = super().check_moves(
+            [pos for pos in moves if pos not in en_passant], safety)
 
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(0, i).piece is None or \
-                        self.pos.get_relative(0, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(0, i))
-
-                    if self.pos.get_relative(0, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(0, -i).piece is None or \
-                        self.pos.get_relative(0, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(0, -i))
-
-                    if self.pos.get_relative(0, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, 0).piece is None or \
-                        self.pos.get_relative(i, 0).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, 0))
-
-                    if self.pos.get_relative(i, 0).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, 0).piece is None or \
-                        self.pos.get_relative(-i, 0).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, 0))
-
-                    if self.pos.get_relative(-i, 0).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        if not ignore_check:
-            moves = self.check_moves(moves)
+        for pos in en_passant:
+            board.make_move(self, pos)
 
-        return moves
+            if king is None or not board.is_attacked(king.pos.index, 1 - self.color):
+                valid_moves.append(pos)
 
+            board.unmake_move()
 
-class Bishop(Piece):
-    def __init__(self, color: PieceColor):
+        return valid_moves
 
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(
-                os.path.join("images", "white_bishop.png"))
-        else:
-            image = pygame.image.load(
-                os.path.join("images", "black_bishop.png"))
+    def move(self, pos: Position, promotion: PieceType = None):
+        board = self.pos.board
+        step = PAWN_STEPS[self.color]
+        double_move = pos.index == self.pos.index + 2 * step
 
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
+        # Take piece on en passant
+        if pos.piece is None and pos.index in PAWN_ATTACKS[self.color][self.pos.index]:
+            board.squares[pos.index - step].piece.take()
 
-        super().__init__(image, color)
+        super().move(pos)
 
-        # Bishop specific
-        self.type = PieceType.BISHOP
+        if double_move:
+            board.en_passant = board.squares[pos.index - step]
 
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
+        # Promote on reaching the last row
+        if not RAYS[PAWN_DIRECTIONS[self.color]][pos.index]:
+            self.promote(promotion or PieceType.QUEEN)
 
-        moves = []
+    def promote(self, piece_type: PieceType):
+        pos = self.pos
+        self.take()
 
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, i).piece is None or \
-                        self.pos.get_relative(i, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, i))
-
-                    if self.pos.get_relative(i, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, i).piece is None or \
-                        self.pos.get_relative(-i, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, i))
-
-                    if self.pos.get_relative(-i, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, -i).piece is None or \
-                        self.pos.get_relative(i, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, -i))
-
-                    if self.pos.get_relative(i, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, -i).piece is None or \
-                        self.pos.get_relative(-i, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, -i))
-
-                    if self.pos.get_relative(-i, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        if not ignore_check:
-            moves = self.check_moves(moves)
+        piece = PIECE_CLASSES[piece_type](self.color)
+        piece.first_move = False
+        pos.board.add_piece(piece, (pos.x, pos.y))
 
-        return moves
+        return piece
 
 
-class Queen(Piece):
+class Rook(Piece):
     def __init__(self, color: PieceColor):
+        super().__init__(color)
 
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(
-                os.path.join("images", "white_queen.png"))
-        else:
-            image = pygame.image.load(
-                os.path.join("images", "black_queen.png"))
+        # Rook specific
+        self.type = PieceType.ROOK
 
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
+    def get_pseudo_moves(self):
+        return self.get_ray_moves(ROOK_DIRECTIONS)
 
-        super().__init__(image, color)
 
-        # Queen specific
-        self.type = PieceType.QUEEN
-
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
-
-        moves = []
+class Bishop(Piece):
+    def __init__(self, color: PieceColor):
+        super().__init__(color)
 
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(0, i).piece is None or \
-                        self.pos.get_relative(0, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(0, i))
-
-                    if self.pos.get_relative(0, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(0, -i).piece is None or \
-                        self.pos.get_relative(0, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(0, -i))
-
-                    if self.pos.get_relative(0, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, 0).piece is None or \
-                        self.pos.get_relative(i, 0).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, 0))
-
-                    if self.pos.get_relative(i, 0).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, 0).piece is None or \
-                        self.pos.get_relative(-i, 0).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, 0))
-
-                    if self.pos.get_relative(-i, 0).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, i).piece is None or \
-                        self.pos.get_relative(i, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, i))
-
-                    if self.pos.get_relative(i, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, i).piece is None or \
-                        self.pos.get_relative(-i, i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, i))
-
-                    if self.pos.get_relative(-i, i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(i, -i).piece is None or \
-                        self.pos.get_relative(i, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(i, -i))
-
-                    if self.pos.get_relative(i, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        for i in range(1, 8):
-            try:
-                if self.pos.get_relative(-i, -i).piece is None or \
-                        self.pos.get_relative(-i, -i).piece.color != self.color:
-                    moves.append(self.pos.get_relative(-i, -i))
-
-                    if self.pos.get_relative(-i, -i).piece is not None:
-                        break
-                else:
-                    break
-            except IndexError:
-                break
-
-        if not ignore_check:
-            moves = self.check_moves(moves)
+        # Bishop specific
+        self.type = PieceType.BISHOP
 
-        return moves
+    def get_pseudo_moves(self):
+        return self.get_ray_moves(BISHOP_DIRECTIONS)
 
 
-class Knight(Piece):
+class Queen(Piece):
     def __init__(self, color: PieceColor):
+        super().__init__(color)
 
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(
-                os.path.join("images", "white_knight.png"))
-        else:
-            image = pygame.image.load(
-                os.path.join("images", "black_knight.png"))
+        # Queen specific
+        self.type = PieceType.QUEEN
+
+    def get_pseudo_moves(self):
+        return self.get_ray_moves(QUEEN_DIRECTIONS)
 
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
 
-        super().__init__(image, color)
+class Knight(Piece):
+    def __init__(self, color: PieceColor):
+        super().__init__(color)
 
         # Knight specific
         self.type = PieceType.KNIGHT
 
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
-
-        moves = []
-
-        for i in [-2, -1, 1, 2]:
-            for j in [-2, -1, 1, 2]:
-                if abs(i) == abs(j):
-                    continue
-
-                try:
-                    if self.pos.get_relative(i, j).piece is None or \
-                            self.pos.get_relative(i, j).piece.color != self.color:
-                        moves.append(self.pos.get_relative(i, j))
-                except IndexError:
-                    continue
-
-        if not ignore_check:
-            moves = self.check_moves(moves)
-
-        return moves
+    def get_pseudo_moves(self):
+        return self.get_target_moves(KNIGHT_TARGETS)
 
 
 class King(Piece):
     def __init__(self, color: PieceColor):
-
-        if color == PieceColor.WHITE:
-            image = pygame.image.load(
-                os.path.join("images", "white_king.png"))
-        else:
-            image = pygame.image.load(
-                os.path.join("images", "black_king.png"))
-
-        image = pygame.transform.scale(
-            image, (PositionStuff.PIECE_SIZE, PositionStuff.PIECE_SIZE))
-
-        super().__init__(image, color)
+        super().__init__(color)
 
         # King specific
         self.type = PieceType.KING
         self.in_check = False
         self.checkmate = False
+        self.stalemate = False
 
-    def get_moves(self, ignore_check: bool = False):
-        if not ignore_check:
-            if self.color != self.pos.board.move % 2:
-                return []
+    def get_pseudo_moves(self):
+        return self.get_target_moves(KING_TARGETS) + self.get_castling_moves()
 
+    def get_castling_moves(self):
+        squares = self.pos.board.squares
         moves = []
 
-        for i in [1, 0, -1]:
-            for j in [1, 0, -1]:
-                if i == 0 and j == 0:
-                    continue
-
-                try:
-                    if self.pos.get_relative(i, j).piece is None or \
-                            self.pos.get_relative(i, j).piece.color != self.color:
-                        moves.append(self.pos.get_relative(i, j))
-                except IndexError:
-                    continue
-
-        # Castling
-        if self.first_move and not self.in_check:
-            if self.color == PieceColor.WHITE:
-                if self.pos.get_relative(1, 0).piece is None and \
-                        self.pos.get_relative(2, 0).piece is None and \
-                        self.pos.get_relative(3, 0).piece is not None and \
-                        self.pos.get_relative(3, 0).piece.type == PieceType.ROOK and \
-                        self.pos.get_relative(3, 0).piece.first_move:
-                    moves.append(self.pos.get_relative(2, 0))
-
-                if self.pos.get_relative(-1, 0).piece is None and \
-                        self.pos.get_relative(-2, 0).piece is None and \
-                        self.pos.get_relative(-3, 0).piece is None and \
-                        self.pos.get_relative(-4, 0).piece is not None and \
-                        self.pos.get_relative(-4, 0).piece.type == PieceType.ROOK and \
-                        self.pos.get_relative(-4, 0).piece.first_move:
-                    moves.append(self.pos.get_relative(-2, 0))
+        if not self.first_move:
+            return moves
 
-        if not ignore_check:
-            original_pos = self.pos
-
-            if self.color == PieceColor.WHITE:
-                opponent_pieces = Piece.black_pieces
-            else:
-                opponent_pieces = Piece.white_pieces
-
-            valid_moves = []
-
-            self.pos.piece = None
-
-            for pos in moves:
-                original_piece = pos.piece
-                self.pos = pos
-
-                opponent_moves = []
-
-                for piece in opponent_pieces:
-                    opponent_moves += piece.get_moves(ignore_check=True)
-
-                if self.pos in opponent_moves:
-                    self.pos.piece = original_piece
-                    continue
+        for color, king_index, rook_index in CASTLING_SQUARES:
+            if color != self.color or king_index != self.pos.index:
+                continue
 
-                valid_moves.append(self.pos)
+            rook = squares[rook_index].piece
 
-                self.pos.piece = original_piece
+            if rook is None or rook.color != self.color or rook.type != PieceType.ROOK or not rook.first_move:
+                continue
 
-            self.pos = original_pos
+            # Every square between the king and the rook has to be empty
+            step = 1 if rook_index > king_index else -1
 
-            return valid_moves
+            if all(squares[index].piece is None for index in range(king_index + step, rook_index, step)):
+                moves.append(squares[king_index + 2 * step])
 
         return moves
 
-    def check_checked(self):
-        """Checks if the king is in check"""
-        if self.color == PieceColor.WHITE:
-            opponent_pieces = Piece.black_pieces
-        else:
-            opponent_pieces = Piece.white_pieces
-
-        opponent_moves = []
-
-        for piece in opponent_pieces:
-            opponent_moves += piece.get_moves(ignore_check=True)
+    def check_moves(self, moves: list, safety: tuple = None):
+        board = self.pos.board
+        opponent = 1 - self.color
 
-        if self.pos in opponent_moves:
-            self.in_check = True
+        if safety is None:
+            in_check = board.is_attacked(self.pos.index, opponent)
         else:
-            self.in_check = False
-
-    def check_checkmate(self):
-        """Checks if the king is in checkmate or stalemate"""
-        # Check all possible moves for the color to prevent checkmate
-        if self.color == PieceColor.WHITE:
-            opponent_pieces = Piece.black_pieces[:]
-            own_pieces = Piece.white_pieces[:]
-        else:
-            opponent_pieces = Piece.white_pieces[:]
-            own_pieces = Piece.black_pieces[:]
+            in_check = len(safety[0]) > 0
 
-        own_moves = []
+        valid_moves = []
 
-        for piece in own_pieces:
-            original_pos = piece.pos
-            if piece.type == PieceType.KING:
-                piece_moves = piece.get_moves()
-                own_moves += piece_moves
+        for pos in moves:
+            # Step out of the way rather than hiding behind itself on the same line
+            if board.is_attacked(pos.index, opponent, ignore=self):
                 continue
-            else:
-                piece_moves = piece.get_moves(ignore_check=True)
-
-            for pos in piece_moves:
-                original_piece = pos.piece
 
-                if original_piece != None and original_piece.color != self.color:
-                    opponent_pieces.remove(original_piece)
+            # Castling can't start in check or pass over an attacked square
+            if abs(pos.index - self.pos.index) == 2:
+                if in_check or board.is_attacked((pos.index + self.pos.index) // 2, opponent):
+                    continue
 
-                pos.piece = piece
+            valid_moves.append(pos)
 
-                opponent_moves = []
+        return valid_moves
 
-                for opponent_piece in opponent_pieces:
-                    opponent_moves += opponent_piece.get_moves(
-                        ignore_check=True)
+    def check_checked(self):
+        """Checks if the king is in check"""
+        self.in_check = self.pos.board.is_attacked(
+            self.pos.index, 1 - self.color)
 
-                if original_piece != None and original_piece.color != self.color:
-                    opponent_pieces.append(original_piece)
+    def move(self, pos: Position, promotion: PieceType = None):
+        # Castling moves the rook to the square the king passed over
+        squares = self.pos.board.squares
 
-                if self.pos in opponent_moves:
-                    pos.piece = original_piece
-                    continue
+        if pos.index == self.pos.index - 2:
+            squares[self.pos.index - 4].piece.move(squares[self.pos.index - 1])
 
-                own_moves.append(pos)
+        if pos.index == self.pos.index + 2:
+            squares[self.pos.index + 3].piece.move(squares[self.pos.index + 1])
 
-                pos.piece = original_piece
+        super().move(pos)
 
-            piece.pos = original_pos
 
-        if len(own_moves) == 0:
-            self.checkmate = True
+PIECE_CLASSES = {PieceType.PAWN: Pawn, PieceType.KNIGHT: Knight, PieceType.BISHOP: Bishop,
+                 PieceType.ROOK: Rook, PieceType.QUEEN: Queen, PieceType.KING: King}
 
-    def move(self, pos: Position):
-        if pos == self.pos.get_relative(-2, 0):
-            rook = self.pos.get_relative(-4, 0)
-            rook.move(self.pos.get_relative(-1, 0))
+# The pieces a pawn can be promoted to, best first
+PROMOTION_TYPES = [PieceType.QUEEN, PieceType.ROOK,
+                   PieceType.BISHOP, PieceType.KNIGHT]
 
-        if pos == self.pos.get_relative(2, 0):
-            rook = self.pos.get_relative(3, 0)
-            rook.move(self.pos.get_relative(1, 0))
 
-        super().move(pos)
+def setup_board(board: Board):
+    """Add the pieces for the standard starting position to a board."""
+    board.load_fen(STARTING_FEN)
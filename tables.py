@@ -0,0 +1,73 @@
+from constants import PieceColor, PieceType
+
+# Lookup tables for piece movement, built once when the module is imported.
+# Squares are referred to by Position.index (y * 8 + x) and every table is a
+# list with one entry per square, so moving pieces never has to check the
+# edges of the board.
+
+ROOK_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+BISHOP_DIRECTIONS = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+KNIGHT_OFFSETS = [(i, j) for i in [-2, -1, 1, 2]
+                  for j in [-2, -1, 1, 2] if abs(i) != abs(j)]
+KING_OFFSETS = [(i, j) for i in [1, 0, -1]
+                for j in [1, 0, -1] if i != 0 or j != 0]
+
+# White pawns move up the board (towards y = 0), black pawns move down
+PAWN_DIRECTIONS = [(0, -1), (0, 1)]
+PAWN_STEPS = [-8, 8]
+PAWN_CAPTURE_OFFSETS = [[(1, -1), (-1, -1)], [(1, 1), (-1, 1)]]
+
+
+def _offset_table(offsets: list):
+    """The squares reachable from each square with one of the offsets"""
+    table = []
+
+    for index in range(64):
+        x, y = index % 8, index // 8
+
+        table.append([(y + j) * 8 + x + i for i, j in offsets
+                      if 0 <= x + i < 8 and 0 <= y + j < 8])
+
+    return table
+
+
+def _ray_table(direction: tuple):
+    """The squares along the direction from each square, nearest first"""
+    table = []
+    i, j = direction
+
+    for index in range(64):
+        x, y = index % 8, index // 8
+        ray = []
+
+        while 0 <= x + i < 8 and 0 <= y + j < 8:
+            x += i
+            y += j
+            ray.append(y * 8 + x)
+
+        table.append(ray)
+
+    return table
+
+
+KNIGHT_TARGETS = _offset_table(KNIGHT_OFFSETS)
+KING_TARGETS = _offset_table(KING_OFFSETS)
+
+# Indexed by color first, then square
+PAWN_ATTACKS = [_offset_table(PAWN_CAPTURE_OFFSETS[PieceColor.WHITE]),
+                _offset_table(PAWN_CAPTURE_OFFSETS[PieceColor.BLACK])]
+
+# Indexed by direction first, then square
+RAYS = {direction: _ray_table(direction) for direction in QUEEN_DIRECTIONS}
+
+# The pieces that can slide along each direction
+SLIDING_TYPES = {direction: (PieceType.ROOK, PieceType.QUEEN) if 0 in direction
+                 else (PieceType.BISHOP, PieceType.QUEEN)
+                 for direction in QUEEN_DIRECTIONS}
+
+# The king and rook squares for each castling right, the right's bit in the
+# castling rights mask is 1 << its place in this list
+CASTLING_SQUARES = [(PieceColor.WHITE, 60, 63), (PieceColor.WHITE, 60, 56),
+                    (PieceColor.BLACK, 4, 7), (PieceColor.BLACK, 4, 0)]
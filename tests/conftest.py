@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from board import Board
+from perft import find_move
+
+
+def play(board: Board, names: list):
+    """Play moves given in UCI notation."""
+    for name in names:
+        board.make_move(*find_move(board, name))
@@ -0,0 +1,78 @@
+import pytest
+from board import Board
+from constants import Backend, PieceType
+from conftest import play
+from perft import find_move, get_moves
+
+# Positions whose moves include castling both ways, en passant and every promotion
+POSITIONS = [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "4k3/1P6/8/8/8/8/6p1/4K2R b K - 0 1",
+]
+
+
+def load(fen: str, backend: str = Backend.OBJECTS):
+    board = Board(backend)
+    board.load_fen(fen)
+    return board
+
+
+def check_moves(board: Board, depth: int):
+    """Make and take back every move to a depth, checking the hash and FEN each time."""
+    fen = board.get_fen()
+    key = board.hash
+
+    for move in get_moves(board):
+        board.make_move(*move)
+        assert board.hash == board.compute_hash()
+
+        if depth > 1:
+            check_moves(board, depth - 1)
+
+        board.unmake_move()
+        assert board.get_fen() == fen
+        assert board.hash == key
+
+
+@pytest.mark.parametrize("backend", [Backend.OBJECTS, Backend.BITBOARD])
+@pytest.mark.parametrize("fen", POSITIONS)
+def test_make_unmake(fen, backend):
+    check_moves(load(fen, backend), 2)
+
+
+@pytest.mark.parametrize("fen, name, after", [
+    # Castling on each side
+    ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "e1g1", "r3k2r/8/8/8/8/8/8/R4RK1 b kq - 1 1"),
+    ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "e8c8", "2kr3r/8/8/8/8/8/8/R3K2R w KQ - 1 2"),
+    # En passant
+    ("rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3", "e5f6",
+     "rnbqkbnr/ppp1p1pp/5P2/3p4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 3"),
+    # Promotion, with and without a capture
+    ("r3k3/1P6/8/8/8/8/8/4K3 w q - 0 1", "b7b8n", "rN2k3/8/8/8/8/8/8/4K3 b q - 0 1"),
+    ("r3k3/1P6/8/8/8/8/8/4K3 w q - 0 1", "b7a8q", "Q3k3/8/8/8/8/8/8/4K3 b - - 0 1"),
+])
+def test_special_moves(fen, name, after):
+    board = load(fen)
+    play(board, [name])
+
+    assert board.get_fen() == after
+    assert board.hash == board.compute_hash() == load(after).hash
+
+    board.unmake_move()
+
+    assert board.get_fen() == fen
+    assert board.hash == load(fen).hash
+
+
+def test_unmake_promotion_restores_the_pawn():
+    board = load("r3k3/1P6/8/8/8/8/8/4K3 w q - 0 1")
+    pawn = board.squares[9].piece
+
+    board.make_move(*find_move(board, "b7a8r"))
+    assert board.squares[0].piece.type == PieceType.ROOK
+
+    board.unmake_move()
+    assert board.squares[9].piece is pawn
+    assert board.squares[0].piece.type == PieceType.ROOK
@@ -0,0 +1,23 @@
+import pytest
+from board import Board
+from engine import MATE_SCORE, Engine
+
+
+@pytest.mark.parametrize("fen, score", [
+    ("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3", -MATE_SCORE),
+    ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", 0),
+])
+def test_no_legal_moves_at_root(fen, score):
+    board = Board()
+    board.load_fen(fen)
+
+    assert Engine().search(board, 3) == (None, score)
+
+
+def test_finds_mate_in_one():
+    board = Board()
+    board.load_fen("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+
+    move, score = Engine().search(board, 3)
+    assert move[1].name == "a8"
+    assert score == MATE_SCORE - 1
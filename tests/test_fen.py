@@ -0,0 +1,57 @@
+import pytest
+from board import STARTING_FEN, Board
+from conftest import play
+from perft import REFERENCE_POSITIONS
+
+
+@pytest.mark.parametrize("fen", [fen for name, fen, counts in REFERENCE_POSITIONS] + [
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+    "8/8/8/8/8/8/8/4K2k b - - 99 150",
+])
+def test_round_trip(fen):
+    board = Board()
+    board.load_fen(fen)
+
+    assert board.get_fen() == fen
+
+
+def test_round_trip_after_moves():
+    board = Board()
+    board.load_fen(STARTING_FEN)
+    play(board, ["e2e4", "g8f6", "e4e5", "d7d5", "e1e2"])
+
+    fen = board.get_fen()
+    assert fen == "rnbqkb1r/ppp1pppp/5n2/3pP3/8/8/PPPPKPPP/RNBQ1BNR b kq - 1 3"
+
+    copy = Board()
+    copy.load_fen(fen)
+    assert copy.get_fen() == fen
+    assert copy.hash == board.hash
+
+
+def test_missing_counters():
+    board = Board()
+    board.load_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -")
+
+    assert board.get_fen() == STARTING_FEN
+
+
+@pytest.mark.parametrize("fen", [
+    "garbage",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "4k3/8/8/8/8/8/8/4K3 w K - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e5 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - zero 1",
+])
+def test_bad_fen(fen):
+    board = Board()
+    board.load_fen(STARTING_FEN)
+
+    with pytest.raises(ValueError):
+        board.load_fen(fen)
+
+    # Nothing is changed when the FEN can't be read
+    assert board.get_fen() == STARTING_FEN
@@ -0,0 +1,18 @@
+import pytest
+from board import Board
+from constants import Backend
+from perft import REFERENCE_POSITIONS, perft
+
+
+@pytest.mark.parametrize("backend", [Backend.OBJECTS, Backend.BITBOARD])
+@pytest.mark.parametrize("depth", [2, 3])
+@pytest.mark.parametrize("name, fen, counts", REFERENCE_POSITIONS,
+                         ids=[name for name, fen, counts in REFERENCE_POSITIONS])
+def test_reference_counts(name, fen, counts, depth, backend):
+    board = Board(backend)
+    board.load_fen(fen)
+
+    assert perft(board, depth) == counts[depth - 1]
+
+    # Every move was taken back
+    assert board.get_fen() == fen
@@ -0,0 +1,88 @@
+import io
+import pytest
+from board import Board
+from constants import PieceType
+from pgn import IllegalMoveError, parse_san, read_games, read_moves, replay_game
+
+
+def load(fen: str):
+    board = Board()
+    board.load_fen(fen)
+    return board
+
+
+def test_castling():
+    board = load("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+
+    piece, pos, promotion = parse_san(board, "O-O")
+    assert (piece.type, pos.name) == (PieceType.KING, "g1")
+
+    piece, pos, promotion = parse_san(board, "0-0-0")
+    assert (piece.type, pos.name) == (PieceType.KING, "c1")
+
+
+def test_castling_through_check():
+    board = load("r3k2r/8/8/8/8/8/5r2/R3K2R w KQkq - 0 1")
+
+    with pytest.raises(IllegalMoveError):
+        parse_san(board, "O-O")
+
+
+@pytest.mark.parametrize("san, promotion", [("e8=Q", PieceType.QUEEN), ("e8N", PieceType.KNIGHT),
+                                            ("dxe8=R", PieceType.ROOK)])
+def test_promotion(san, promotion):
+    board = load("4r2k/3P4/8/8/8/8/8/K7 w - - 0 1" if "x" in san else "7k/4P3/8/8/8/8/8/K7 w - - 0 1")
+
+    piece, pos, found = parse_san(board, san)
+    assert (piece.type, pos.name, found) == (PieceType.PAWN, "e8", promotion)
+
+
+def test_missing_promotion():
+    board = load("7k/4P3/8/8/8/8/8/K7 w - - 0 1")
+
+    with pytest.raises(IllegalMoveError, match="missing promotion"):
+        parse_san(board, "e8")
+
+
+def test_disambiguation():
+    board = load("7k/8/8/8/8/R7/8/RN1NK3 w - - 0 1")
+
+    assert parse_san(board, "Nbc3")[0].pos.name == "b1"
+    assert parse_san(board, "Ndc3")[0].pos.name == "d1"
+    assert parse_san(board, "R1a2")[0].pos.name == "a1"
+    assert parse_san(board, "R3a2")[0].pos.name == "a3"
+
+    with pytest.raises(IllegalMoveError, match="ambiguous"):
+        parse_san(board, "Nc3")
+
+
+def test_read_moves_skips_comments_and_variations():
+    movetext = "1. e4 {best by test} e5 (1... c5 2. Nf3) 2. Nf3 $1 ; to the end\nNc6 1-0"
+
+    assert list(read_moves(movetext)) == ["e4", "e5", "Nf3", "Nc6"]
+
+
+def test_header_like_line_in_comment():
+    pgn = '[Event "Blitz"]\n\n1. e4 { text\n[%clk 0:03:00] } 1... e5 2. Nf3 Nc6\n\n' \
+          '[Event "Next"]\n\n1. d4 *\n'
+
+    games = list(read_games(io.StringIO(pgn)))
+    assert [headers["Event"] for headers, movetext in games] == ["Blitz", "Next"]
+
+    game = replay_game(*games[0])
+    assert game["error"] is None
+    assert game["plies"] == 4
+
+
+def test_bad_fen_header():
+    game = replay_game({"FEN": "garbage"}, "1. e4")
+
+    assert game["plies"] == 0
+    assert "FEN" in game["error"]
+
+
+def test_illegal_move():
+    game = replay_game({}, "1. e4 e5 2. Ke3")
+
+    assert game["plies"] == 2
+    assert game["error"] == "2. Ke3: illegal move"
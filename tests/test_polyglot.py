@@ -0,0 +1,79 @@
+import pytest
+from board import STARTING_FEN, Board
+from conftest import play
+from polyglot import ENTRY, OpeningBook, get_polyglot_key
+
+# Keys given with the Polyglot book format, after each list of moves
+KEYS = [
+    ([], 0x463b96181691fc9c),
+    (["e2e4"], 0x823c9b50fd114196),
+    (["e2e4", "d7d5"], 0x0756b94461c50fb0),
+    (["e2e4", "d7d5", "e4e5"], 0x662fafb965db29d4),
+    (["e2e4", "d7d5", "e4e5", "f7f5"], 0x22a48b5a8e47ff78),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2"], 0x652a607ca3f242c1),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2", "e8f7"], 0x00fdd303c946bdd9),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4"], 0x3c8123ea7b067637),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4", "b4c3", "a1a3"], 0x5c3f9b829b279560),
+]
+
+
+@pytest.mark.parametrize("moves, key", KEYS)
+def test_key(moves, key):
+    board = Board()
+    board.load_fen(STARTING_FEN)
+    play(board, moves)
+
+    assert get_polyglot_key(board) == key
+
+
+def polyglot_move(start: str, end: str):
+    """Encode a move the way Polyglot books store it."""
+    def square(name):
+        return "abcdefgh".index(name[0]), int(name[1]) - 1
+
+    (from_file, from_row), (to_file, to_row) = square(start), square(end)
+    return to_file | to_row << 3 | from_file << 6 | from_row << 9
+
+
+def test_book(tmp_path):
+    castling_fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+    board = Board()
+    board.load_fen(castling_fen)
+    castling_key = get_polyglot_key(board)
+
+    entries = [
+        (KEYS[0][1], polyglot_move("e2", "e4"), 3, 0),
+        (KEYS[0][1], polyglot_move("d2", "d4"), 1, 0),
+        (KEYS[0][1], polyglot_move("e2", "e5"), 5, 0),  # Not legal, left out
+        (KEYS[1][1], polyglot_move("e7", "e5"), 1, 0),
+        # Castling is stored as the king taking its own rook
+        (castling_key, polyglot_move("e1", "h1"), 1, 0),
+    ]
+
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"".join(ENTRY.pack(*entry) for entry in sorted(entries)))
+
+    with OpeningBook(str(path)) as book:
+        board.load_fen(STARTING_FEN)
+        assert sorted(book.get_moves(board)) == [("d2d4", 1), ("e2e4", 3)]
+
+        play(board, ["e2e4"])
+        assert book.get_moves(board) == [("e7e5", 1)]
+        assert book.choose_move(board) == "e7e5"
+
+        play(board, ["e7e5"])
+        assert book.choose_move(board) is None
+
+        board.load_fen(castling_fen)
+        assert book.get_moves(board) == [("e1g1", 1)]
+
+
+def test_empty_book(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+
+    board = Board()
+    board.load_fen(STARTING_FEN)
+
+    with OpeningBook(str(path)) as book:
+        assert book.get_moves(board) == []
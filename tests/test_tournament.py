@@ -0,0 +1,72 @@
+import pytest
+from board import STARTING_FEN, Board
+from engine import in_check
+from tournament import get_elo, get_llr, parse_engine, play_game
+
+# Never adjudicates, so the tests can turn on only the rule they look at
+NO_ADJUDICATION = {"win_score": 10 ** 6, "win_plies": 1, "draw_score": -1, "draw_plies": 1,
+                   "draw_after": 0}
+
+
+def engine(name: str):
+    return {**parse_engine(name), "depth": 1, "time": None}
+
+
+def play(fen: str, **adjudication):
+    return play_game(fen, engine("white"), engine("black"), {**NO_ADJUDICATION, **adjudication})
+
+
+def test_get_elo():
+    assert get_elo([]) == (0.0, 0.0)
+    assert get_elo([1.0, 0.0] * 10)[0] == pytest.approx(0.0)
+    assert get_elo([0.5] * 10) == (0.0, 0.0)
+
+    elo, margin = get_elo([1.0, 0.5, 1.0, 0.0] * 25)
+    assert elo == pytest.approx(88.7, abs=0.1)
+    assert 0 < margin < elo
+
+    # Losing the same games is the same difference the other way
+    assert get_elo([0.0, 0.5, 0.0, 1.0] * 25)[0] == pytest.approx(-elo)
+
+
+def test_get_llr():
+    assert get_llr([], 0, 5) == 0.0
+    assert get_llr([0.5] * 10, 0, 5) == 0.0
+
+    # Winning more often is evidence for the engine being stronger
+    assert get_llr([1.0, 0.5, 1.0, 0.0] * 25, 0, 5) > 0
+    assert get_llr([0.0, 0.5, 0.0, 1.0] * 25, 0, 5) < 0
+    assert get_llr([1.0, 0.0] * 25, 0, 5) < 0
+
+
+def test_in_check():
+    board = Board()
+    board.load_fen("4k3/8/8/8/8/8/8/4K2r w - - 0 1")
+    assert in_check(board)
+
+    board.load_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+    assert not in_check(board)
+
+
+def test_checkmate_and_stalemate():
+    game = play("4k3/8/8/8/8/8/8/3qKq2 w - - 0 1")
+    assert (game["result"], game["reason"], game["moves"]) == ("0-1", "checkmate", [])
+
+    game = play("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1")
+    assert (game["result"], game["reason"], game["moves"]) == ("1/2-1/2", "stalemate", [])
+
+
+def test_adjudicated_win():
+    # Both engines have to see white winning for win_plies plies in a row
+    game = play("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1", win_score=500, win_plies=3)
+
+    assert (game["result"], game["reason"]) == ("1-0", "adjudicated win")
+    assert len(game["moves"]) == 3
+
+
+def test_adjudicated_draw():
+    # Only plies from draw_after on count towards the draw
+    game = play(STARTING_FEN, draw_score=200, draw_plies=3, draw_after=4)
+
+    assert (game["result"], game["reason"]) == ("1/2-1/2", "adjudicated draw")
+    assert len(game["moves"]) == 7
@@ -0,0 +1,74 @@
+from board import STARTING_FEN, Board
+from constants import PieceType
+from perft import get_move_name, get_moves
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, encode_move
+
+
+def test_store_and_probe():
+    table = TranspositionTable(1)
+
+    assert table.probe(12345) is None
+
+    table.store(12345, 7, LOWER, -250, 0x1234)
+    assert table.probe(12345) == (7, LOWER, -250, 0x1234)
+    assert table.get_stats()["hits"] == 1
+    assert table.get_stats()["misses"] == 1
+
+
+def test_mate_scores_fit():
+    table = TranspositionTable(1)
+
+    table.store(1, 1, EXACT, 100000, 0)
+    table.store(2, 1, UPPER, -100000, 0)
+
+    assert table.probe(1)[2] == 100000
+    assert table.probe(2)[2] == -100000
+
+
+def test_replacement():
+    table = TranspositionTable(1)
+    buckets = table.mask + 1
+
+    # Keys in the same bucket
+    deep, shallow, newer = 5, 5 + buckets, 5 + 2 * buckets
+
+    table.store(deep, 8, EXACT, 10, 0)
+    table.store(shallow, 3, EXACT, 20, 0)
+
+    # The shallower search goes in the second entry instead of replacing the deep one
+    assert table.probe(deep) == (8, EXACT, 10, 0)
+    assert table.probe(shallow) == (3, EXACT, 20, 0)
+
+    # The second entry is always replaced
+    table.store(newer, 2, EXACT, 30, 0)
+    assert table.probe(deep) is not None
+    assert table.probe(shallow) is None
+    assert table.probe(newer) == (2, EXACT, 30, 0)
+    assert table.overwrites == 1
+
+    # A search at least as deep replaces the first entry
+    table.store(shallow, 9, LOWER, 40, 0)
+    assert table.probe(deep) is None
+    assert table.probe(shallow) == (9, LOWER, 40, 0)
+
+
+def test_clear():
+    table = TranspositionTable(1)
+    table.store(99, 1, EXACT, 0, 0)
+    table.clear()
+
+    assert table.probe(99) is None
+
+
+def test_encode_move():
+    board = Board()
+    board.load_fen(STARTING_FEN)
+    codes = {get_move_name(*move): encode_move(move) for move in get_moves(board)}
+
+    assert codes["e2e4"] == 52 | 36 << 6
+    assert len(set(codes.values())) == len(codes)
+    assert encode_move(None) == 0
+
+    board.load_fen("7k/P7/8/8/8/8/8/K7 w - - 0 1")
+    promotions = {encode_move(move) >> 12 for move in get_moves(board) if move[0].type == PieceType.PAWN}
+    assert promotions == {1, 2, 3, 4}
@@ -0,0 +1,38 @@
+import io
+import pytest
+from board import STARTING_FEN
+from uci import UCI
+
+
+def run(commands: list):
+    """Send commands to a new UCI engine and return what it wrote back."""
+    output = io.StringIO()
+    uci = UCI(output)
+    uci.run(line + "\n" for line in commands)
+    return output.getvalue().splitlines()
+
+
+@pytest.mark.parametrize("command", [
+    "position fen garbage",
+    "perft x",
+    "go perft x",
+    "go depth x",
+    "setoption name Hash value abc",
+    "setoption name BookFile value does-not-exist.bin",
+])
+def test_bad_command_is_reported(command):
+    lines = run([command, "isready"])
+
+    assert lines[0].startswith("info string ")
+    assert lines[-1] == "readyok"
+
+
+def test_bad_fen_keeps_the_position():
+    lines = run(["position startpos moves e2e4", "position fen garbage", "d"])
+
+    assert lines[-1] == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+
+
+def test_illegal_move():
+    assert run(["position startpos moves e2e5", "d"]) == [
+        "info string illegal move e2e5", STARTING_FEN]
@@ -0,0 +1,327 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+from batch import ordered_map
+from board import STARTING_FEN, Board
+from constants import PieceColor, PieceType
+from engine import Engine, in_check
+from perft import get_move_name, get_moves
+from transposition import TranspositionTable
+
+# Plays engines against each other without a window, several games at once.
+# Every opening is played twice with the colors swapped, so neither engine
+# gets the better side of a random opening more often.
+
+# The settings an engine can be given, with their defaults
+ENGINE_SETTINGS = {"depth": 100, "time": 0.1, "hash": 4}
+
+# Games longer than this are drawn
+MAX_PLIES = 300
+
+
+def parse_engine(text: str):
+    """Read an engine from name:setting=value,... like fast:time=0.05,hash=8."""
+    name, _, settings = text.partition(":")
+    engine = {"name": name, **ENGINE_SETTINGS}
+
+    for setting in filter(None, settings.split(",")):
+        key, value = setting.split("=")
+
+        if key not in ENGINE_SETTINGS:
+            raise ValueError(f"Unknown engine setting {key}")
+
+        engine[key] = type(ENGINE_SETTINGS[key])(value)
+
+    return engine
+
+
+def make_opening(rng: random.Random, plies: int):
+    """Play random moves from the starting position and return the FEN reached."""
+    board = Board()
+    board.load_fen(STARTING_FEN)
+
+    for _ in range(plies):
+        moves = get_moves(board)
+
+        # Don't hand the engines a finished game
+        if len(moves) == 0:
+            break
+
+        board.make_move(*rng.choice(moves))
+
+        if not board.has_legal_move(board.move % 2):
+            board.unmake_move()
+            break
+
+    return board.get_fen()
+
+
+def has_mating_material(board: Board):
+    """Check if there is enough material left on the board for either side to mate."""
+    for color in [PieceColor.WHITE, PieceColor.BLACK]:
+        for piece_type in [PieceType.PAWN, PieceType.ROOK, PieceType.QUEEN]:
+            if board.get_pieces(color, piece_type):
+                return True
+
+    # A single knight or bishop can't mate on its own
+    minors = [piece for piece in board.pieces[PieceColor.WHITE] + board.pieces[PieceColor.BLACK]
+              if piece.type in [PieceType.KNIGHT, PieceType.BISHOP]]
+
+    return len(minors) > 1
+
+
+def play_game(fen: str, white: dict, black: dict, adjudication: dict):
+    """Play one game between two engines, in a worker process.
+
+    Returns a dict with the result from white's point of view, why the game
+    ended and how each engine performed.
+    """
+    start = time.perf_counter()
+
+    board = Board()
+    board.load_fen(fen)
+
+    players = [white, black]
+    engines = [Engine(TranspositionTable(player["hash"])) for player in players]
+    nodes = [0, 0]
+    seconds = [0.0, 0.0]
+
+    repetitions = {board.hash: 1}
+    moves = []
+
+    # How many plies in a row the adjudication conditions held for, winning
+    # is negative while black is winning
+    winning = 0
+    drawn = 0
+
+    result, reason = "1/2-1/2", "max plies"
+
+    for ply in range(MAX_PLIES):
+        color = board.move % 2
+
+        if not board.has_legal_move(color):
+            if in_check(board):
+                result, reason = ("0-1" if color == PieceColor.WHITE else "1-0"), "checkmate"
+            else:
+                result, reason = "1/2-1/2", "stalemate"
+            break
+
+        if board.halfmove_clock >= 100:
+            result, reason = "1/2-1/2", "fifty moves"
+            break
+
+        if repetitions[board.hash] >= 3:
+            result, reason = "1/2-1/2", "repetition"
+            break
+
+        if not has_mating_material(board):
+            result, reason = "1/2-1/2", "insufficient material"
+            break
+
+        engine = engines[color]
+        player = players[color]
+
+        search_start = time.perf_counter()
+        move, score = engine.search(board, player["depth"], player["time"])
+        seconds[color] += time.perf_counter() - search_start
+        nodes[color] += engine.nodes
+
+        moves.append(get_move_name(*move))
+        board.make_move(*move)
+        repetitions[board.hash] = repetitions.get(board.hash, 0) + 1
+
+        # Scores are from the mover's point of view, both engines have to agree
+        # the same side is winning
+        white_score = score if color == PieceColor.WHITE else -score
+
+        if abs(white_score) >= adjudication["win_score"]:
+            side = 1 if white_score > 0 else -1
+            winning = winning + side if winning * side >= 0 else side
+
+            if abs(winning) >= adjudication["win_plies"]:
+                result, reason = ("1-0" if white_score > 0 else "0-1"), "adjudicated win"
+                break
+        else:
+            winning = 0
+
+        if ply >= adjudication["draw_after"] and abs(score) <= adjudication["draw_score"]:
+            drawn += 1
+            if drawn >= adjudication["draw_plies"]:
+                result, reason = "1/2-1/2", "adjudicated draw"
+                break
+        else:
+            drawn = 0
+
+    return {"fen": fen, "white": white["name"], "black": black["name"], "result": result,
+            "reason": reason, "moves": moves, "nodes": nodes, "search_seconds": seconds,
+            "seconds": time.perf_counter() - start, "pid": os.getpid()}
+
+
+def get_score(game: dict, name: str):
+    """The points an engine got from a game."""
+    if game["result"] == "1/2-1/2":
+        return 0.5
+
+    winner = game["white"] if game["result"] == "1-0" else game["black"]
+    return 1.0 if winner == name else 0.0
+
+
+def score_to_elo(score: float):
+    """The Elo difference that gives an expected score."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def get_elo(scores: list):
+    """Estimate the Elo difference from a list of game scores, with a 95% error margin."""
+    count = len(scores)
+    if count == 0:
+        return 0.0, 0.0
+
+    mean = sum(scores) / count
+    variance = sum((score - mean) ** 2 for score in scores) / count
+    error = 1.96 * math.sqrt(variance / count)
+
+    return score_to_elo(mean), (score_to_elo(mean + error) - score_to_elo(mean - error)) / 2
+
+
+def get_llr(scores: list, elo0: float, elo1: float):
+    """The log likelihood ratio of the engine being elo1 better rather than elo0.
+
+    Uses the normal approximation of the generalised SPRT on the game scores.
+    """
+    count = len(scores)
+    if count == 0:
+        return 0.0
+
+    mean = sum(scores) / count
+    variance = sum((score - mean) ** 2 for score in scores) / count
+
+    if variance == 0:
+        return 0.0
+
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+
+    return count * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def get_tasks(engines: list, pairs: int, opening_plies: int, seed: int, adjudication: dict):
+    """Yield the games to play, each opening twice with the colors swapped."""
+    rng = random.Random(seed)
+    first, second = engines
+
+    for _ in range(pairs):
+        fen = make_opening(rng, opening_plies)
+
+        yield fen, first, second, adjudication
+        yield fen, second, first, adjudication
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play engines against each other and estimate the difference in strength.")
+    parser.add_argument("--engine", action="append", type=parse_engine, default=[],
+                        help="an engine as name:setting=value,..., given twice, "
+                             f"settings are {', '.join(ENGINE_SETTINGS)}")
+    parser.add_argument("--games", type=int, default=100,
+                        help="how many games to play, rounded up to an even number")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random openings")
+    parser.add_argument("--opening-plies", type=int, default=6,
+                        help="random moves played before the engines take over")
+    parser.add_argument("--win-score", type=int, default=1000,
+                        help="score in centipawns past which a game is adjudicated as won")
+    parser.add_argument("--win-plies", type=int, default=6)
+    parser.add_argument("--draw-score", type=int, default=10,
+                        help="score in centipawns under which a game is adjudicated as drawn")
+    parser.add_argument("--draw-plies", type=int, default=12)
+    parser.add_argument("--draw-after", type=int, default=80,
+                        help="plies before a game can be adjudicated as drawn")
+    parser.add_argument("--elo0", type=float, default=0, help="SPRT Elo for the null hypothesis")
+    parser.add_argument("--elo1", type=float, default=10, help="SPRT Elo for the alternative")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--output", help="file to write every game's result to as JSON")
+    args = parser.parse_args()
+
+    if len(args.engine) != 2:
+        parser.error("give exactly two engines with --engine")
+
+    first, second = args.engine
+    if first["name"] == second["name"]:
+        parser.error("the engines need different names")
+
+    if args.games < 2:
+        parser.error("play at least 2 games, one with each color")
+
+    adjudication = {"win_score": args.win_score, "win_plies": args.win_plies,
+                    "draw_score": args.draw_score, "draw_plies": args.draw_plies,
+                    "draw_after": args.draw_after}
+
+    lower = math.log(args.beta / (1 - args.alpha))
+    upper = math.log((1 - args.beta) / args.alpha)
+
+    tasks = get_tasks(args.engine, (args.games + 1) // 2, args.opening_plies, args.seed, adjudication)
+
+    games = []
+    scores = []
+    verdict = None
+    start = time.perf_counter()
+
+    with Pool(args.processes) as pool:
+        for game in ordered_map(pool, play_game, tasks, args.processes * 2):
+            games.append(game)
+            scores.append(get_score(game, first["name"]))
+
+            print(f"Game {len(games)}, {game['white']} - {game['black']} {game['result']} "
+                  f"({game['reason']}, {len(game['moves'])} plies)")
+
+            # Only stop between pairs, so both colors of an opening are counted
+            if len(games) % 2 == 0 and len(games) >= 2:
+                llr = get_llr(scores, args.elo0, args.elo1)
+                if llr >= upper:
+                    verdict = f"H1 accepted, {first['name']} is at least {args.elo1:g} Elo stronger"
+                elif llr <= lower:
+                    verdict = f"H0 accepted, {first['name']} is not {args.elo1:g} Elo stronger"
+
+                if verdict is not None:
+                    pool.terminate()
+                    break
+
+    seconds = time.perf_counter() - start
+
+    wins = scores.count(1.0)
+    losses = scores.count(0.0)
+    draws = scores.count(0.5)
+    elo, margin = get_elo(scores)
+    llr = get_llr(scores, args.elo0, args.elo1)
+
+    print()
+    print(f"{first['name']} vs {second['name']}: {wins} wins, {losses} losses, {draws} draws "
+          f"in {len(games)} games, {seconds:.1f}s")
+    print(f"Elo: {elo:+.1f} +/- {margin:.1f}")
+    print(f"SPRT ({args.elo0:g}, {args.elo1:g}): LLR {llr:.2f} ({lower:.2f}, {upper:.2f}), "
+          f"{verdict or 'no verdict yet'}")
+
+    for engine in args.engine:
+        # Each game's counts are indexed by the color the engine played
+        colors = [PieceColor.WHITE if game["white"] == engine["name"] else PieceColor.BLACK
+                  for game in games]
+        nodes = sum(game["nodes"][color] for game, color in zip(games, colors))
+        search_seconds = sum(game["search_seconds"][color] for game, color in zip(games, colors))
+        nps = nodes / search_seconds if search_seconds > 0 else 0
+        print(f"{engine['name']}: {nodes} nodes in {search_seconds:.1f}s ({nps:.0f} nodes/s)")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"engines": args.engine, "games": games, "elo": elo, "margin": margin,
+                       "llr": llr, "verdict": verdict}, file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+from array import array
+from constants import PieceType
+
+# Entries are kept in two flat arrays instead of a dict of objects, so the
+# table takes a fixed amount of memory decided when it's created. Each entry
+# is a 64 bit key and 64 bits of packed data:
+#
+#   bits 0-15   the best move, see encode_move
+#   bits 16-23  the depth searched
+#   bits 24-25  what the score means, EXACT, LOWER or UPPER
+#   bits 26-    the score, offset to keep it positive
+
+ENTRY_BYTES = 16
+
+# Each bucket holds an entry that is only replaced by a deeper search, and
+# one that is always replaced
+BUCKET_SIZE = 2
+
+EXACT = 0
+LOWER = 1  # The score is at least this, the search failed high
+UPPER = 2  # The score is at most this, the search failed low
+
+SCORE_OFFSET = 1 << 30
+
+# Promotion types by their code in an encoded move, 0 is no promotion
+PROMOTION_CODES = [None, PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]
+
+
+def encode_move(move: tuple):
+    """Pack a (piece, position, promotion) move into 15 bits.
+
+    Has to be called before the move is made, while the piece is still on its
+    starting square.
+    """
+    if move is None:
+        return 0
+
+    piece, pos, promotion = move
+    return piece.pos.index | pos.index << 6 | PROMOTION_CODES.index(promotion) << 12
+
+
+class TranspositionTable:
+    """Remembers the results of searching positions, by their Zobrist hash."""
+
+    def __init__(self, size_mb: float = 16):
+        # The number of buckets is rounded down to a power of two so a bucket
+        # can be found by masking the key
+        buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        buckets = 1 << (buckets.bit_length() - 1)
+
+        self.mask = buckets - 1
+        self.keys = array("Q", bytes(8 * buckets * BUCKET_SIZE))
+        self.data = array("q", bytes(8 * buckets * BUCKET_SIZE))
+
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def reset_stats(self):
+        """Start counting hits and misses again."""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def clear(self):
+        """Forget every entry."""
+        self.keys = array("Q", bytes(8 * len(self.keys)))
+        self.data = array("q", bytes(8 * len(self.data)))
+
+        self.reset_stats()
+
+    def probe(self, key: int):
+        """Look up a position's hash.
+
+        Returns the depth, flag, score and encoded move stored for it, or None
+        if it isn't in the table.
+        """
+        self.probes += 1
+        index = (key & self.mask) * BUCKET_SIZE
+
+        for slot in range(index, index + BUCKET_SIZE):
+            if self.keys[slot] == key:
+                self.hits += 1
+                data = self.data[slot]
+
+                return (data >> 16 & 0xFF, data >> 24 & 0x3,
+                        (data >> 26) - SCORE_OFFSET, data & 0xFFFF)
+
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: int):
+        """Remember the result of searching a position.
+
+        The first entry of the bucket keeps the deepest search, anything that
+        doesn't beat it goes in the second entry.
+        """
+        self.stores += 1
+        index = (key & self.mask) * BUCKET_SIZE
+        data = (score + SCORE_OFFSET) << 26 | flag << 24 | min(depth, 0xFF) << 16 | move
+
+        if self.keys[index] == key or self.keys[index] == 0 or depth >= self.data[index] >> 16 & 0xFF:
+            slot = index
+        else:
+            slot = index + 1
+
+        if self.keys[slot] != key and self.keys[slot] != 0:
+            self.overwrites += 1
+
+        self.keys[slot] = key
+        self.data[slot] = data
+
+    def get_stats(self):
+        """Describe how well the table is working."""
+        # Sample the start of the table to estimate how full it is, like UCI's hashfull
+        sample = min(len(self.keys), 1000)
+        used = sum(1 for index in range(sample) if self.keys[index] != 0)
+
+        return {"probes": self.probes, "hits": self.hits, "misses": self.probes - self.hits,
+                "hit_rate": self.hits / self.probes if self.probes else 0,
+                "stores": self.stores, "overwrites": self.overwrites,
+                "hashfull": used * 1000 // sample}
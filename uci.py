@@ -0,0 +1,253 @@
+import sys
+import threading
+from board import STARTING_FEN, Board
+from constants import PieceColor
+from engine import MATE_SCORE, MAX_PLY, Engine
+from perft import divide, find_move, get_move_name
+from polyglot import OpeningBook
+from transposition import TranspositionTable
+
+# Speaks the Universal Chess Interface over stdin and stdout, so the engine
+# can be run by chess GUIs and match runners. Searches run in a thread so
+# stop and isready are answered while the engine thinks.
+
+NAME = "Chess"
+AUTHOR = "Chess contributors"
+
+DEFAULT_HASH = 16
+
+# How many moves are assumed to be left when the GUI doesn't say
+DEFAULT_MOVES_TO_GO = 30
+
+# Kept back from the clock to cover the time taken to send the move
+MOVE_OVERHEAD = 0.05
+
+
+def format_score(score: int):
+    """Write a score as UCI's cp or mate."""
+    if score >= MATE_SCORE - MAX_PLY:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_SCORE + MAX_PLY:
+        return f"mate {-((MATE_SCORE + score) // 2)}"
+    return f"cp {score}"
+
+
+def get_time_limit(board: Board, options: dict):
+    """Work out how long to search for from the options of a go command."""
+    if "movetime" in options:
+        return max(0.0, options["movetime"] / 1000 - MOVE_OVERHEAD)
+
+    if board.move % 2 == PieceColor.WHITE:
+        remaining, increment = options.get("wtime"), options.get("winc", 0)
+    else:
+        remaining, increment = options.get("btime"), options.get("binc", 0)
+
+    if remaining is None:
+        return None
+
+    moves_to_go = options.get("movestogo", DEFAULT_MOVES_TO_GO)
+    limit = remaining / 1000 / moves_to_go + increment / 1000 * 0.8
+
+    # Never use more than half of what's left
+    return max(0.0, min(limit, remaining / 1000 / 2) - MOVE_OVERHEAD)
+
+
+class UCI:
+    """Reads UCI commands and answers them."""
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.lock = threading.Lock()
+
+        self.board = Board()
+        self.board.load_fen(STARTING_FEN)
+
+        self.table = TranspositionTable(DEFAULT_HASH)
+        self.engine = Engine(self.table)
+
+        # A Polyglot book to answer from before searching
+        self.book = None
+
+        # The search in progress, and whether it waits for stop before answering
+        self.thread = None
+        self.infinite = False
+        self.stop_event = threading.Event()
+
+    def send(self, line: str):
+        """Write a line to the GUI."""
+        with self.lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, lines=sys.stdin):
+        """Answer commands until quit or the end of the input."""
+        for line in lines:
+            if not self.handle(line):
+                break
+
+        self.stop()
+
+    def handle(self, line: str):
+        """Answer a single command, returns False on quit."""
+        words = line.split()
+
+        if not words:
+            return True
+
+        command, args = words[0], words[1:]
+
+        if command == "quit":
+            return False
+
+        # A bad command is reported to the GUI rather than ending the engine
+        try:
+            self.run_command(command, args)
+        except (ValueError, OSError) as error:
+            self.send(f"info string {error}")
+
+        return True
+
+    def run_command(self, command: str, args: list):
+        """Carry out a command other than quit."""
+        if command == "stop":
+            self.stop()
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "d":
+            self.send(self.board.get_fen())
+        elif command == "uci":
+            self.send(f"id name {NAME}")
+            self.send(f"id author {AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH} min 1 max 4096")
+            self.send("option name BookFile type string default <empty>")
+            self.send("uciok")
+        else:
+            # Everything else changes the position or the engine, which the
+            # search is using
+            self.stop()
+
+            if command == "ucinewgame":
+                self.table.clear()
+            elif command == "setoption":
+                self.set_option(args)
+            elif command == "position":
+                self.set_position(args)
+            elif command == "go":
+                self.go(args)
+            elif command == "perft":
+                self.perft(int(args[0]) if args else 1)
+            else:
+                self.send(f"info string unknown command {command}")
+
+    def set_option(self, args: list):
+        """Handle setoption name <name> value <value>."""
+        if "value" not in args or args[:1] != ["name"]:
+            return
+
+        name = " ".join(args[1:args.index("value")]).lower()
+        value = " ".join(args[args.index("value") + 1:])
+
+        if name == "hash":
+            self.table = TranspositionTable(float(value))
+            self.engine = Engine(self.table)
+        elif name == "bookfile":
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+
+            if value not in ["", "<empty>"]:
+                self.book = OpeningBook(value)
+
+    def set_position(self, args: list):
+        """Handle position [startpos | fen <fen>] [moves <move> ...]."""
+        moves = []
+        if "moves" in args:
+            moves = args[args.index("moves") + 1:]
+            args = args[:args.index("moves")]
+
+        if args[:1] == ["fen"]:
+            self.board.load_fen(" ".join(args[1:]))
+        else:
+            self.board.load_fen(STARTING_FEN)
+
+        # Moves are made on the board rather than loading the final position,
+        # so the search can see repetitions
+        for name in moves:
+            move = find_move(self.board, name)
+
+            if move is None:
+                self.send(f"info string illegal move {name}")
+                return
+
+            self.board.make_move(*move)
+
+    def go(self, args: list):
+        """Handle go, starting a search in the background."""
+        if args[:1] == ["perft"]:
+            self.perft(int(args[1]) if len(args) > 1 else 1)
+            return
+
+        options = {}
+        for key, value in zip(args, args[1:]):
+            if key in ["wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth"]:
+                options[key] = int(value)
+
+        self.infinite = "infinite" in args or "ponder" in args
+
+        if self.book is not None and not self.infinite:
+            name = self.book.choose_move(self.board)
+
+            if name is not None:
+                self.send(f"bestmove {name}")
+                return
+        time_limit = None if self.infinite else get_time_limit(self.board, options)
+        depth = options.get("depth", MAX_PLY)
+
+        self.engine.stopped = False
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.search, args=(depth, time_limit), daemon=True)
+        self.thread.start()
+
+    def search(self, depth: int, time_limit: float):
+        """Search the position and send the best move, in the search's thread."""
+        def callback(info):
+            nps = int(info["nodes"] / info["seconds"]) if info["seconds"] > 0 else 0
+            self.send(f"info depth {info['depth']} score {format_score(info['score'])} "
+                      f"nodes {info['nodes']} nps {nps} time {int(info['seconds'] * 1000)} "
+                      f"hashfull {info['hashfull']} pv {info['move']}")
+
+        move, score = self.engine.search(self.board, depth, time_limit, callback)
+
+        # The GUI expects the best move only once it says stop
+        if self.infinite:
+            self.stop_event.wait()
+
+        self.send(f"bestmove {get_move_name(*move) if move is not None else '0000'}")
+
+    def stop(self):
+        """Stop the search if there is one, and wait for its best move to be sent."""
+        if self.thread is None:
+            return
+
+        self.engine.stop()
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def perft(self, depth: int):
+        """Count the positions below each move, the same way as perft.py --divide."""
+        results = divide(self.board, depth)
+
+        for name, count in sorted(results.items()):
+            self.send(f"{name}: {count}")
+
+        self.send("")
+        self.send(f"Nodes searched: {sum(results.values())}")
+
+
+def main():
+    UCI().run()
+
+
+if __name__ == '__main__':
+    main()
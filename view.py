@@ -0,0 +1,256 @@
+import os
+import pygame
+from board import Board, Position, Piece
+from constants import Colors, TransparentColors, PieceColor, PieceType, PositionStuff
+
+# Piece images and highlight overlays shared by every view in the process,
+# see get_sprite and get_overlay
+_images = {}
+_sprites = {}
+_overlays = {}
+
+
+def get_sprite(piece_type: PieceType, color: PieceColor, size: int):
+    """Get the image of a piece scaled to a size.
+
+    Each image file is only loaded once, and each size only scaled once, no
+    matter how many pieces or boards use it.
+    """
+    key = (piece_type, color, size)
+
+    if key not in _sprites:
+        if (piece_type, color) not in _images:
+            if color == PieceColor.WHITE:
+                name = f"white_{piece_type.lower()}.png"
+            else:
+                name = f"black_{piece_type.lower()}.png"
+
+            _images[piece_type, color] = pygame.image.load(
+                os.path.join("images", name))
+
+        sprite = pygame.transform.scale(
+            _images[piece_type, color], (size, size))
+
+        # Match the display's pixel format so blitting doesn't convert every frame
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+
+        _sprites[key] = sprite
+
+    return _sprites[key]
+
+
+def get_overlay(color: tuple, size: int):
+    """Get a square of a partially transparent color to draw over a position."""
+    key = (color, size)
+
+    if key not in _overlays:
+        overlay = pygame.Surface((size, size), pygame.SRCALPHA)
+        overlay.fill(color)
+        _overlays[key] = overlay
+
+    return _overlays[key]
+
+
+class BoardView:
+    """Draws a board to the screen and turns clicks into moves."""
+
+    def __init__(self, board: Board, x: int, y: int, size: int):
+        self.board = board
+
+        self.x = x
+        self.y = y
+        self.size = size // 8 * 8  # Rounds to the nearest multiple of 8
+
+        # The squares never change, so they're drawn once and copied under
+        # each position that is redrawn, see draw
+        self.screen = pygame.Surface((self.size, self.size))
+        self.background = self.draw_background()
+
+        # Pieces shrink to fit on small boards
+        self.piece_size = min(PositionStuff.PIECE_SIZE, self.size // 8)
+
+        self.positions = [[PositionView(position, self.size // 8, self)
+                           for position in row] for row in board.board]
+
+        self.selected_pos = None
+
+    @property
+    def selected_pos(self):
+        """Stores which position is selected."""
+        return self._selected_pos
+
+    @selected_pos.setter
+    def selected_pos(self, pos: 'PositionView'):
+
+        try:
+            if self._selected_pos is not None:
+                self._selected_pos.selected = False
+        except AttributeError:
+            self._selected_pos = None
+            return
+
+        if pos is None:
+            self._selected_pos = None
+            return
+
+        self._selected_pos = pos
+        self._selected_pos.selected = True
+
+    def draw_background(self):
+        """Draw the squares of the board, which never change."""
+        background = pygame.Surface((self.size, self.size))
+        size = self.size // 8
+
+        for y in range(8):
+            for x in range(8):
+                # Check white or black
+                if x % 2 == y % 2:
+                    color = Colors.WHITE
+                else:
+                    color = Colors.DARK_GRAY
+
+                pygame.draw.rect(background, color, (x * size, y * size, size, size))
+
+        return background
+
+    def get_view(self, position: Position):
+        """Get the view of a position on the board."""
+        return self.positions[position.y][position.x]
+
+    def get_image(self, piece: Piece):
+        """Get the image used to draw a piece."""
+        return get_sprite(piece.type, piece.color, self.piece_size)
+
+    def draw(self, screen: pygame.Surface):
+        """Draw the positions that changed since the last frame.
+
+        Each changed position copies its square from the background, then
+        blends its highlights and piece over it, so only the changed squares
+        are composited.
+
+        Returns the rects of the screen that were drawn to, so only those
+        need to be pushed to the display.
+        """
+        for row in self.positions:
+            for position in row:
+                position.hovered = False
+
+        if self.selected_pos is not None:
+            for pos in self.selected_pos.position.get_moves():
+                self.get_view(pos).hovered = True
+
+        changed = []
+
+        for row in self.positions:
+            for position in row:
+                state = position.get_state()
+
+                if state != position.drawn_state:
+                    position.draw(self.screen)
+                    position.drawn_state = state
+                    changed.append(position)
+
+        for position in changed:
+            screen.blit(self.screen, position.screen_rect, position.rect)
+
+        return [position.screen_rect for position in changed]
+
+    def redraw(self):
+        """Draw every position on the next frame, even if it hasn't changed."""
+        for row in self.positions:
+            for position in row:
+                position.drawn_state = None
+
+    def handle_click(self, pos: tuple):
+        """Send the click to the selected position."""
+        x, y = pos
+        x -= self.x
+        y -= self.y
+
+        # If click is out of bounds, return
+        if x < 0 or y < 0 or x >= self.size or y >= self.size:
+            return
+
+        x = x // (self.size // 8)
+        y = y // (self.size // 8)
+
+        self.positions[y][x].handle_click()
+
+
+class PositionView:
+    """Draws a square of the board and handles clicks on it."""
+
+    def __init__(self, position: Position, size: int, view: BoardView):
+        self.position = position
+        self.size = size
+        self.view = view
+
+        self.selected = False
+        self.hovered = False
+
+        # What the position looked like when it was last drawn, see get_state
+        self.drawn_state = None
+
+        # Where the position is on the board, and on the screen
+        self.rect = pygame.Rect(position.x * size, position.y * size, size, size)
+        self.screen_rect = self.rect.move(view.x, view.y)
+
+        # Where a piece's image goes to be centered in the square
+        self.piece_pos = (self.rect.centerx - view.piece_size // 2,
+                          self.rect.centery - view.piece_size // 2)
+
+    def __repr__(self):
+        return f"PositionView({self.position.x}, {self.position.y})"
+
+    def get_state(self):
+        """Everything that decides how the position looks."""
+        piece = self.position.piece
+
+        if piece is None:
+            return (self.selected, self.hovered)
+
+        if piece.type == PieceType.KING:
+            return (self.selected, self.hovered, piece.type, piece.color,
+                    piece.in_check, piece.checkmate, piece.stalemate)
+
+        return (self.selected, self.hovered, piece.type, piece.color)
+
+    def draw(self, screen: pygame.Surface):
+        """Draw the position with its piece and highlights."""
+        piece = self.position.piece
+
+        # Start from the bare square, each highlight is blended over the last
+        screen.blit(self.view.background, self.rect, self.rect)
+
+        if self.selected:
+            # Draw partially transparent square
+            screen.blit(get_overlay(TransparentColors.YELLOW, self.size), self.rect)
+
+        if self.hovered:
+            if piece is None:
+                screen.blit(get_overlay(TransparentColors.BLUE, self.size), self.rect)
+            else:
+                screen.blit(get_overlay(TransparentColors.RED, self.size), self.rect)
+
+        if piece is not None:
+            if piece.type == PieceType.KING:
+                if piece.in_check and not piece.checkmate:
+                    screen.blit(get_overlay(TransparentColors.DARK_RED, self.size), self.rect)
+                elif piece.checkmate or piece.stalemate:
+                    screen.blit(get_overlay(TransparentColors.DARK_GRAY5, self.size), self.rect)
+
+            # Draw piece in the center of the square
+            screen.blit(self.view.get_image(piece), self.piece_pos)
+
+    def handle_click(self):
+        """Handle a click on the position."""
+        selected_pos = self.view.selected_pos
+
+        if selected_pos is not None and self.position in selected_pos.position.get_moves():
+            selected_pos.position.move(self.position)
+            self.view.selected_pos = None
+        elif self.selected:
+            self.view.selected_pos = None
+        else:
+            self.view.selected_pos = self
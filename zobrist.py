@@ -0,0 +1,24 @@
+import random
+from constants import PieceColor, PieceType
+
+# Random keys for Zobrist hashing. A position's hash is the XOR of the keys
+# for every piece on its square, the castling rights, the en passant file and
+# the side to move. The generator is seeded so every process agrees on the
+# keys and hashes can be shared between them.
+
+_random = random.Random(0x5EED)
+
+# Indexed by (color, type) first, then square
+PIECE_KEYS = {(color, piece_type): [_random.getrandbits(64) for _ in range(64)]
+              for color in [PieceColor.WHITE, PieceColor.BLACK]
+              for piece_type in [PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+                                 PieceType.ROOK, PieceType.QUEEN, PieceType.KING]}
+
+# Indexed by the castling rights bit mask, see tables.CASTLING_SQUARES
+CASTLING_KEYS = [0] + [_random.getrandbits(64) for _ in range(15)]
+
+# Indexed by the file (x) of the en passant square
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+
+# Included when black is to move
+BLACK_TO_MOVE_KEY = _random.getrandbits(64)